@@ -0,0 +1,215 @@
+"""Motor de escoragem em lote: processa os dados em blocos, opcionalmente em paralelo."""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+from padroes import CHUNK_PADRAO, LIMIAR_PADRAO
+
+# Estado de cada processo do pool (preenchido uma única vez no initializer)
+_ESTADO_WORKER = {}
+
+
+@dataclass
+class ResultadoEscoragem:
+    """Resumo de uma execução de escoragem em lote."""
+    linhas: int
+    segundos: float
+    resultado: Optional[pd.DataFrame] = None
+
+    @property
+    def linhas_por_segundo(self):
+        return self.linhas / self.segundos if self.segundos > 0 else float('inf')
+
+
+def _schema_parquet(tabela):
+    """
+    Schema do arquivo Parquet a partir do primeiro bloco.
+
+    Colunas só com nulos no primeiro bloco têm tipo `null`, para o qual os blocos
+    seguintes não podem ser convertidos; elas são gravadas como texto.
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+        for campo in tabela.schema
+    ])
+
+
+class EscritorIncremental:
+    """Grava os blocos escorados em CSV ou Parquet à medida que ficam prontos."""
+
+    def __init__(self, caminho, formato=None, schema=None):
+        self.caminho = str(caminho)
+        self.formato = formato or ('parquet' if self.caminho.endswith('.parquet') else 'csv')
+        self._writer = None
+        # Schema explícito (pyarrow) das colunas de saída; sem ele, vem do primeiro bloco
+        self._schema = schema
+        self._primeiro = True
+
+    def escrever(self, bloco):
+        if self.formato == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if self._writer is None:
+                if self._schema is None:
+                    self._schema = _schema_parquet(tabela)
+                self._writer = pq.ParquetWriter(self.caminho, self._schema)
+            # Todos os blocos seguem o mesmo schema (ex: int que virou float em outro bloco)
+            self._writer.write_table(tabela.cast(self._schema))
+        else:
+            bloco.to_csv(self.caminho, mode='w' if self._primeiro else 'a',
+                         header=self._primeiro, index=False)
+        self._primeiro = False
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def iterar_blocos(df, chunksize=CHUNK_PADRAO):
+    """Divide um DataFrame em blocos consecutivos de linhas (sem cópia)."""
+    for inicio in range(0, len(df), chunksize):
+        yield df.iloc[inicio:inicio + chunksize]
+
+
+def classificar(model, probabilidades, limiar=LIMIAR_PADRAO):
+    """Deriva a classe prevista da probabilidade da classe positiva, sem chamar predict."""
+    positivos = (probabilidades > limiar).astype(np.intp)
+    classes = getattr(model, 'classes_', None)
+    return np.asarray(classes)[positivos] if classes is not None else positivos
+
+
+def escorar_bloco(model, bloco, preparar, relatorio, limiar=LIMIAR_PADRAO):
+    """
+    Escora um bloco com uma única passada pelo modelo.
+
+    Args:
+        model: Modelo com predict_proba
+        bloco: DataFrame com os dados originais
+        preparar: Função que recebe o bloco e retorna a matriz de entrada do modelo
+        relatorio: Função (bloco, classes, probabilidades) -> DataFrame de resultado
+        limiar: Probabilidade a partir da qual o registro é da classe positiva
+    """
+    X = preparar(bloco)
+    probabilidades = model.predict_proba(X)[:, 1]
+    return relatorio(bloco, classificar(model, probabilidades, limiar), probabilidades)
+
+
+def _iniciar_worker(model, preparar, relatorio, limiar):
+    # Caminho do artefato: cada processo mapeia o mesmo arquivo (mmap somente leitura)
+    if isinstance(model, str):
+        model = model_registry.abrir_artefato(model)
+    _ESTADO_WORKER.update(model=model, preparar=preparar, relatorio=relatorio, limiar=limiar)
+
+
+def _escorar_no_worker(bloco):
+    return escorar_bloco(
+        _ESTADO_WORKER['model'],
+        bloco,
+        _ESTADO_WORKER['preparar'],
+        _ESTADO_WORKER['relatorio'],
+        _ESTADO_WORKER['limiar']
+    )
+
+
+def _contexto_processos():
+    # fork não é seguro em processos com threads (ex: servidor do Streamlit): pode travar
+    # e gera DeprecationWarning no Python 3.12+. Os workers partem de um processo limpo
+    # e recebem as funções uma única vez no initializer; o modelo vai como caminho do artefato
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+
+
+def _escorar_paralelo(blocos, model, preparar, relatorio, limiar, n_processos):
+    """
+    Escora os blocos em um pool de processos, mantendo a ordem e poucos blocos em memória.
+
+    Modelos do model_registry seguem para os processos como o caminho do artefato,
+    não como cópia serializada dos seus arrays.
+    """
+    artefato = model_registry.artefato_de(model)
+    with ProcessPoolExecutor(
+        max_workers=n_processos,
+        mp_context=_contexto_processos(),
+        initializer=_iniciar_worker,
+        initargs=(str(artefato) if artefato is not None else model, preparar, relatorio, limiar)
+    ) as executor:
+        pendentes = deque()
+        for bloco in blocos:
+            pendentes.append(executor.submit(_escorar_no_worker, bloco))
+            if len(pendentes) >= 2 * n_processos:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+
+def escorar_em_blocos(model, dados, preparar, relatorio, limiar=LIMIAR_PADRAO,
+                      chunksize=CHUNK_PADRAO, n_processos=1, destino=None,
+                      formato=None, manter_resultado=True, progresso=None):
+    """
+    Escora os dados em blocos, calculando as probabilidades uma única vez.
+
+    Args:
+        model: Modelo com predict_proba
+        dados: DataFrame ou iterável de DataFrames (blocos)
+        preparar: Função que recebe um bloco e retorna a matriz de entrada do modelo
+        relatorio: Função (bloco, classes, probabilidades) -> DataFrame de resultado
+        limiar: Probabilidade a partir da qual o registro é da classe positiva
+        chunksize: Linhas por bloco quando `dados` é um DataFrame
+        n_processos: Quantidade de processos (1 = sem paralelismo)
+        destino: Arquivo (CSV ou Parquet) onde os resultados são gravados bloco a bloco
+        formato: 'csv' ou 'parquet' (padrão: pela extensão do destino)
+        manter_resultado: Se True, também devolve o DataFrame completo de resultados
+        progresso: Função opcional chamada com o total de linhas já escoradas
+
+    Returns:
+        ResultadoEscoragem
+    """
+    inicio = time.perf_counter()
+    blocos = iterar_blocos(dados, chunksize) if isinstance(dados, pd.DataFrame) else dados
+    n_processos = max(1, min(n_processos or 1, os.cpu_count() or 1))
+
+    if n_processos > 1:
+        resultados = _escorar_paralelo(blocos, model, preparar, relatorio, limiar, n_processos)
+    else:
+        resultados = (escorar_bloco(model, bloco, preparar, relatorio, limiar) for bloco in blocos)
+
+    escritor = EscritorIncremental(destino, formato) if destino else None
+    partes = []
+    linhas = 0
+    try:
+        for resultado in resultados:
+            linhas += len(resultado)
+            if escritor is not None:
+                escritor.escrever(resultado)
+            if manter_resultado:
+                partes.append(resultado)
+            if progresso is not None:
+                progresso(linhas)
+    finally:
+        if escritor is not None:
+            escritor.fechar()
+
+    resultado_final = None
+    if manter_resultado:
+        resultado_final = pd.concat(partes) if partes else pd.DataFrame()
+
+    return ResultadoEscoragem(linhas, time.perf_counter() - inicio, resultado_final)
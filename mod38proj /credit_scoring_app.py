@@ -1,16 +1,24 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import pickle
-import time
 from datetime import datetime
-import io
+import os
+import warnings
+from functools import partial
 import plotly.express as px
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import ColumnTransformer
-from sklearn.base import BaseEstimator, TransformerMixin
+
+import batch_scoring
+import model_registry
+import result_export
+# OutlierRemover fica no namespace do app para abrir modelos que referenciam __main__.OutlierRemover
+from scoring import (
+    OutlierRemover,
+    carregar_assinatura,
+    compilar_plano,
+    generate_score_report,
+    preparar_entrada,
+    validar_entrada,
+)
+from scoring import load_model as _load_model
 
 # ============================================================================
 # CONFIGURAÇÃO DA APLICAÇÃO
@@ -25,162 +33,13 @@ st.set_page_config(
 # ============================================================================
 # CLASSES E FUNÇÕES AUXILIARES
 # ============================================================================
+# O núcleo da escoragem fica em scoring.py (sem Streamlit); aqui só o cache da interface
 
-class OutlierRemover(BaseEstimator, TransformerMixin):
-    """Remove outliers usando IQR ou Z-score"""
-    def __init__(self, method='iqr', factor=1.5):
-        self.method = method
-        self.factor = factor
-        self.bounds_ = {}
-    
-    def fit(self, X, y=None):
-        if isinstance(X, pd.DataFrame):
-            numeric_cols = X.select_dtypes(include=[np.number]).columns
-            for col in numeric_cols:
-                if self.method == 'iqr':
-                    Q1 = X[col].quantile(0.25)
-                    Q3 = X[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower_bound = Q1 - self.factor * IQR
-                    upper_bound = Q3 + self.factor * IQR
-                    self.bounds_[col] = (lower_bound, upper_bound)
-        return self
-    
-    def transform(self, X):
-        X_transformed = X.copy()
-        if isinstance(X_transformed, pd.DataFrame):
-            for col, (lower, upper) in self.bounds_.items():
-                if col in X_transformed.columns:
-                    median_val = X_transformed[col].median()
-                    X_transformed.loc[X_transformed[col] < lower, col] = median_val
-                    X_transformed.loc[X_transformed[col] > upper, col] = median_val
-        return X_transformed
-
-@st.cache_data
+# O modelo não passa pelo st.cache_data (que copiaria o objeto a cada acesso): o
+# model_registry mantém uma única instância por processo, compartilhada entre as sessões
 def load_model(model_path):
     """Carrega o modelo treinado"""
-    try:
-        with open(model_path, 'rb') as file:
-            model = pickle.load(file)
-        return model, True
-    except Exception as e:
-        return str(e), False
-
-def diagnose_model(model):
-    """Analisa o modelo para descobrir o formato esperado dos dados"""
-    diagnosis = {}
-    
-    try:
-        preprocessor = model.named_steps['preprocessor']
-        
-        if hasattr(preprocessor, 'transformers_'):
-            for name, transformer, columns in preprocessor.transformers_:
-                if name == 'cat':
-                    onehot_encoder = transformer.named_steps['onehot']
-                    if hasattr(onehot_encoder, 'categories_'):
-                        diagnosis['categorical_columns'] = columns
-                        diagnosis['categories_per_column'] = {}
-                        for i, col in enumerate(columns):
-                            diagnosis['categories_per_column'][col] = list(onehot_encoder.categories_[i])
-                
-                elif name == 'num':
-                    diagnosis['numerical_columns'] = columns
-        
-        diagnosis['success'] = True
-        
-    except Exception as e:
-        diagnosis['success'] = False
-        diagnosis['error'] = str(e)
-    
-    return diagnosis
-
-def preprocess_data(df, model_diagnosis=None):
-    """Aplica pré-processamento nos dados baseado no diagnóstico do modelo"""
-    df_processed = df.copy()
-    
-    # Limpeza básica
-    if 'id_cliente' in df_processed.columns:
-        df_processed.drop(columns=['id_cliente'], inplace=True)
-    
-    # Converter datas se existir
-    if 'data_ref' in df_processed.columns:
-        try:
-            df_processed['data_ref'] = pd.to_datetime(df_processed['data_ref'])
-        except:
-            st.warning("Não foi possível converter a coluna 'data_ref'")
-    
-    # Padronizar colunas boolean
-    for col in ['posse_de_veiculo', 'posse_de_imovel']:
-        if col in df_processed.columns:
-            df_processed[col] = df_processed[col].replace({
-                'False': 'N', 'True': 'S', False: 'N', True: 'S'
-            })
-    
-    # Padronizar educação
-    mapeamento_educacao = {
-        'Secundário': 'Médio',
-        'Primário': 'Fundamental',
-    }
-    if 'educacao' in df_processed.columns:
-        df_processed['educacao'] = df_processed['educacao'].replace(mapeamento_educacao)
-    
-    # Processar com base no diagnóstico do modelo
-    if model_diagnosis and model_diagnosis.get('success'):
-        categories_expected = model_diagnosis.get('categories_per_column', {})
-        
-        for col, expected_categories in categories_expected.items():
-            if col in df_processed.columns:
-                if any(val in expected_categories for val in [True, False]):
-                    # Modelo espera booleanos
-                    mapping = {
-                        'Y': True, 'N': False, 'S': True,
-                        'YES': True, 'NO': False, 'SIM': True, 'NAO': False, 'NÃO': False,
-                        '1': True, '0': False, 1: True, 0: False,
-                        'TRUE': True, 'FALSE': False, 'T': True, 'F': False,
-                        True: True, False: False
-                    }
-                    df_processed[col] = df_processed[col].astype(str).str.upper().map(mapping)
-                    df_processed[col] = df_processed[col].fillna(False)
-                else:
-                    # Modelo espera strings
-                    df_processed[col] = df_processed[col].astype(str)
-                    df_processed[col] = df_processed[col].replace(['nan', 'None'], 'missing')
-                    df_processed[col] = df_processed[col].fillna('missing')
-    
-    # Processar colunas numéricas
-    colunas_numericas = ['qtd_filhos', 'idade', 'tempo_emprego', 'qt_pessoas_residencia', 'renda']
-    for col in colunas_numericas:
-        if col in df_processed.columns:
-            df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce')
-            df_processed[col] = df_processed[col].fillna(0)
-    
-    # Determinar colunas disponíveis
-    if model_diagnosis and 'categorical_columns' in model_diagnosis:
-        colunas_categoricas = model_diagnosis['categorical_columns']
-        colunas_numericas = model_diagnosis['numerical_columns']
-    else:
-        colunas_categoricas = ['sexo', 'posse_de_veiculo', 'posse_de_imovel', 
-                              'tipo_renda', 'educacao', 'estado_civil', 'tipo_residencia']
-        colunas_numericas = ['qtd_filhos', 'idade', 'tempo_emprego', 
-                            'qt_pessoas_residencia', 'renda']
-    
-    colunas_existentes = list(colunas_categoricas) + list(colunas_numericas)
-    colunas_disponiveis = [col for col in colunas_existentes if col in df_processed.columns]
-    
-    return df_processed, colunas_disponiveis
-
-def generate_score_report(df_original, predictions, probabilities):
-    """Gera relatório de escoragem"""
-    df_resultado = df_original.copy()
-    df_resultado['score_probabilidade'] = probabilities
-    df_resultado['score_classe'] = predictions
-    df_resultado['score_rating'] = pd.cut(
-        probabilities,
-        bins=[0, 0.1, 0.3, 0.5, 0.7, 1.0],
-        labels=['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo']
-    )
-    
-    return df_resultado
+    return _load_model(model_path)
 
 # ============================================================================
 # TELAS DA APLICAÇÃO
@@ -207,8 +66,8 @@ def tela_carregamento():
                     st.session_state.model = model_result
                     st.success("✅ Modelo carregado com sucesso!")
                     
-                    # Diagnosticar o modelo
-                    diagnosis = diagnose_model(model_result)
+                    # Assinatura gravada com o modelo (sem percorrer o pipeline)
+                    diagnosis = carregar_assinatura(model_file)
                     st.session_state.model_diagnosis = diagnosis
                     
                     if diagnosis['success']:
@@ -319,6 +178,14 @@ def tela_diagnostico():
             if 'numerical_columns' in diagnosis:
                 for col in diagnosis['numerical_columns']:
                     st.write(f"• {col}")
+
+            validacao = validar_entrada(df, diagnosis)
+            if validacao['colunas_faltantes']:
+                st.warning(f"⚠️ Colunas ausentes nos dados: {', '.join(validacao['colunas_faltantes'])}")
+            for col, valores in validacao['categorias_desconhecidas'].items():
+                st.warning(f"⚠️ {col}: categorias desconhecidas pelo modelo {valores[:10]}")
+            if not validacao['colunas_faltantes'] and not validacao['categorias_desconhecidas']:
+                st.success("✅ Dados compatíveis com a assinatura do modelo")
         else:
             st.error("❌ Diagnóstico do modelo não disponível")
     
@@ -354,37 +221,78 @@ def tela_escoragem():
     # Execução da Escoragem
     st.header("⚡ Executar Escoragem")
     
+    with st.expander("⚙️ Opções de execução"):
+        col_opt1, col_opt2, col_opt3 = st.columns(3)
+        with col_opt1:
+            chunksize = st.number_input(
+                "Registros por bloco:",
+                min_value=1_000,
+                value=batch_scoring.CHUNK_PADRAO,
+                step=10_000,
+                help="Os dados são escorados em blocos para limitar o uso de memória"
+            )
+        with col_opt2:
+            n_processos = st.number_input(
+                "Processos em paralelo:",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=1,
+                help="Distribui os blocos entre vários processos"
+            )
+        with col_opt3:
+            limiar = st.slider(
+                "Limiar de classificação:",
+                min_value=0.0,
+                max_value=1.0,
+                value=batch_scoring.LIMIAR_PADRAO,
+                step=0.01,
+                help="Probabilidade acima da qual o registro é classificado como inadimplente"
+            )
+    
     col_exec1, col_exec2 = st.columns([2, 1])
     
     with col_exec1:
         if st.button("🚀 Executar Escoragem", type="primary", use_container_width=True):
             with st.spinner("Executando escoragem..."):
                 try:
-                    start_time = time.time()
-                    
                     df = st.session_state.df_original
                     model_diagnosis = st.session_state.get('model_diagnosis', None)
+                    plano = compilar_plano(model_diagnosis)
+                    barra = st.progress(0.0)
+                    _remover_resultados()
+                    destino = result_export.novo_destino()
                     
-                    # Pré-processamento
-                    df_processed, colunas_disponiveis = preprocess_data(df, model_diagnosis)
-                    
-                    # Preparar dados para o modelo
-                    X_score = df_processed[colunas_disponiveis]
-                    
-                    # Fazer predições
-                    predictions = st.session_state.model.predict(X_score)
-                    probabilities = st.session_state.model.predict_proba(X_score)[:, 1]
-                    
-                    end_time = time.time()
-                    
-                    # Gerar relatório
-                    df_resultado = generate_score_report(df, predictions, probabilities)
+                    # Uma única passada pelo modelo por bloco (predict_proba)
+                    with warnings.catch_warnings(record=True) as avisos:
+                        warnings.simplefilter("always")
+                        execucao = batch_scoring.escorar_em_blocos(
+                            st.session_state.model,
+                            df,
+                            preparar=partial(preparar_entrada, plano=plano),
+                            relatorio=generate_score_report,
+                            limiar=limiar,
+                            chunksize=int(chunksize),
+                            n_processos=int(n_processos),
+                            # Gravado uma única vez; os downloads partem deste arquivo
+                            destino=str(destino),
+                            formato='parquet',
+                            progresso=lambda linhas: barra.progress(min(linhas / max(len(df), 1), 1.0))
+                        )
+                    barra.empty()
+                    for aviso in {str(a.message) for a in avisos}:
+                        st.warning(aviso)
                     
                     # Armazenar resultados
-                    st.session_state.df_resultado = df_resultado
-                    st.session_state.processing_time = end_time - start_time
+                    st.session_state.df_resultado = execucao.resultado
+                    st.session_state.resultado_arquivo = str(destino)
+                    st.session_state.resultado_data = datetime.now()
+                    st.session_state.processing_time = execucao.segundos
+                    st.session_state.throughput = execucao.linhas_por_segundo
                     
-                    st.success(f"✅ Escoragem concluída em {end_time - start_time:.2f} segundos!")
+                    st.success(
+                        f"✅ Escoragem concluída em {execucao.segundos:.2f} segundos "
+                        f"({execucao.linhas_por_segundo:,.0f} registros/s)!"
+                    )
                     st.balloons()
                     
                 except Exception as e:
@@ -395,6 +303,8 @@ def tela_escoragem():
         if 'df_resultado' in st.session_state:
             st.success("✅ Escoragem Concluída")
             st.metric("Tempo", f"{st.session_state.processing_time:.2f}s")
+            if 'throughput' in st.session_state:
+                st.metric("Velocidade", f"{st.session_state.throughput:,.0f} registros/s")
         else:
             st.info("⏳ Aguardando execução")
     
@@ -402,6 +312,12 @@ def tela_escoragem():
     if 'df_resultado' in st.session_state:
         mostrar_resultados()
 
+def _remover_resultados():
+    """Apaga os arquivos da escoragem anterior desta sessão"""
+    if 'resultado_arquivo' in st.session_state:
+        result_export.remover(st.session_state.resultado_arquivo)
+        del st.session_state.resultado_arquivo
+
 def mostrar_resultados():
     """Mostra os resultados da escoragem"""
     st.markdown("---")
@@ -487,17 +403,43 @@ def mostrar_resultados():
     st.markdown("---")
     st.header("💾 Download dos Resultados")
     
-    csv_buffer = io.StringIO()
-    df_res.to_csv(csv_buffer, index=False)
-    csv_data = csv_buffer.getvalue()
+    if 'resultado_arquivo' not in st.session_state:
+        st.info("ℹ️ Execute a escoragem novamente para gerar os arquivos de download")
+        return
     
-    st.download_button(
-        label="📥 Baixar Resultados (CSV)",
-        data=csv_data,
-        file_name=f"escoragem_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        use_container_width=True
+    formato = st.radio(
+        "Formato do arquivo:",
+        options=list(result_export.FORMATOS_DOWNLOAD),
+        format_func=lambda f: {'parquet': 'Parquet', 'csv.gz': 'CSV compactado (gzip)'}[f],
+        horizontal=True
     )
+    extensao, mime = result_export.FORMATOS_DOWNLOAD[formato]
+    downloads = st.session_state.setdefault('downloads_prontos', {})
+    
+    # O arquivo só é gerado e lido quando pedido (o Parquet já existe desde a escoragem).
+    # O download_button carrega o arquivo inteiro na memória, então ele só aparece
+    # depois do pedido e some assim que o download é feito, em vez de a cada rerun
+    if st.button("📦 Preparar arquivo para download", use_container_width=True):
+        if formato not in downloads or downloads[formato][0] != st.session_state.resultado_arquivo:
+            with st.spinner("Gerando arquivo..."):
+                caminho = result_export.preparar_download(st.session_state.resultado_arquivo, formato)
+            downloads[formato] = (st.session_state.resultado_arquivo, str(caminho))
+        st.session_state.download_liberado = (st.session_state.resultado_arquivo, formato)
+    
+    if st.session_state.get('download_liberado') == (st.session_state.resultado_arquivo, formato) \
+            and formato in downloads and downloads[formato][0] == st.session_state.resultado_arquivo:
+        data_escoragem = st.session_state.get('resultado_data', datetime.now())
+        caminho = downloads[formato][1]
+        st.caption(f"Tamanho: {os.path.getsize(caminho) / 1024 ** 2:,.1f} MB")
+        with open(caminho, 'rb') as arquivo:
+            st.download_button(
+                label=f"📥 Baixar Resultados ({extensao.lstrip('.').upper()})",
+                data=arquivo,
+                file_name=f"escoragem_{data_escoragem.strftime('%Y%m%d_%H%M%S')}{extensao}",
+                mime=mime,
+                use_container_width=True,
+                on_click=lambda: st.session_state.pop('download_liberado', None)
+            )
 
 # ============================================================================
 # SIDEBAR E NAVEGAÇÃO
@@ -540,6 +482,8 @@ def criar_sidebar():
     # Botão limpar cache
     if st.sidebar.button("🗑️ Limpar Cache", use_container_width=True):
         st.cache_data.clear()
+        model_registry.limpar_cache()
+        _remover_resultados()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.sidebar.success("Cache limpo!")
@@ -0,0 +1,196 @@
+"""
+Registro de artefatos de modelo.
+
+O modelo gravado em pickle é convertido uma única vez para um artefato joblib sem
+compressão, identificado pelo hash do conteúdo do arquivo original. O artefato é
+aberto com memory map: os arrays numpy do modelo ficam em páginas somente leitura
+do sistema operacional, compartilhadas entre as sessões do Streamlit e os
+processos de escoragem, e cada processo desserializa o modelo só uma vez.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import joblib
+
+# Diretório dos artefatos convertidos (configurável por variável de ambiente)
+REGISTRY_DIR = Path(os.environ.get("PREDICTX_MODEL_CACHE", ".cache/models"))
+
+_BLOCO_HASH = 8 * 1024 * 1024
+
+# Cache do processo: {hash do conteúdo: modelo}, {hash: assinatura} e
+# {(caminho, mtime, tamanho): hash}
+_MODELOS = {}
+_ASSINATURAS = {}
+_HASHES = {}
+_LOCK = threading.RLock()
+
+
+def hash_arquivo(caminho):
+    """Calcula o hash (blake2b) do conteúdo de um arquivo lendo-o em blocos."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(_BLOCO_HASH), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _hash_origem(caminho):
+    # Evita reler o arquivo original enquanto ele não muda
+    estado = os.stat(caminho)
+    chave = (str(Path(caminho).resolve()), estado.st_mtime_ns, estado.st_size)
+    if chave not in _HASHES:
+        _HASHES[chave] = hash_arquivo(caminho)
+    return _HASHES[chave]
+
+
+def _caminhos(hash_origem):
+    return REGISTRY_DIR / f"{hash_origem}.joblib", REGISTRY_DIR / f"{hash_origem}.json"
+
+
+def _caminho_assinatura(hash_origem):
+    return REGISTRY_DIR / f"{hash_origem}.assinatura.json"
+
+
+def _gravar_assinatura(hash_origem, dados):
+    REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    _caminho_assinatura(hash_origem).write_text(json.dumps(dados, ensure_ascii=False))
+    _ASSINATURAS[hash_origem] = dados
+
+
+def publicar(model, hash_origem, assinar=None):
+    """
+    Grava o modelo como artefato joblib sem compressão (permite memory map).
+
+    Args:
+        model: Modelo a gravar
+        hash_origem: Hash do arquivo original do modelo
+        assinar: Função opcional model -> dict com a assinatura do modelo, gravada
+            ao lado do artefato
+
+    Returns:
+        Path: Caminho do artefato
+    """
+    artefato, manifesto = _caminhos(hash_origem)
+    REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    # Nome temporário único no mesmo diretório: publicações simultâneas do mesmo
+    # modelo não escrevem no mesmo arquivo, e o os.replace continua atômico
+    with tempfile.NamedTemporaryFile(dir=REGISTRY_DIR, prefix=f"{hash_origem}.", suffix=".tmp",
+                                     delete=False) as arquivo:
+        temporario = Path(arquivo.name)
+    try:
+        joblib.dump(model, temporario)
+        os.replace(temporario, artefato)
+    finally:
+        temporario.unlink(missing_ok=True)
+    manifesto.write_text(json.dumps({"origem": hash_origem, "artefato": hash_arquivo(artefato)}))
+    if assinar is not None:
+        _gravar_assinatura(hash_origem, assinar(model))
+    return artefato
+
+
+def _artefato_valido(hash_origem):
+    artefato, manifesto = _caminhos(hash_origem)
+    if not artefato.exists() or not manifesto.exists():
+        return False
+    try:
+        dados = json.loads(manifesto.read_text())
+    except ValueError:
+        return False
+    return dados.get("origem") == hash_origem and dados.get("artefato") == hash_arquivo(artefato)
+
+
+def carregar(model_path, preparar=None, assinar=None):
+    """
+    Carrega um modelo pelo registro, uma única vez por processo.
+
+    Args:
+        model_path: Arquivo do modelo (pickle ou joblib)
+        preparar: Função opcional chamada antes de desserializar o pickle original
+            (ex: registrar classes referenciadas por __main__)
+        assinar: Função opcional model -> dict usada ao converter o modelo (ver publicar)
+
+    Returns:
+        O modelo, com os arrays numpy abertos em memory map somente leitura
+    """
+    hash_origem = _hash_origem(model_path)
+    with _LOCK:
+        if hash_origem in _MODELOS:
+            return _MODELOS[hash_origem]
+
+        if preparar is not None:
+            preparar()
+        artefato, _ = _caminhos(hash_origem)
+        if not _artefato_valido(hash_origem):
+            # Primeira vez (ou artefato corrompido): converte o arquivo original
+            # (joblib.load também abre pickles comuns)
+            publicar(joblib.load(model_path), hash_origem, assinar)
+
+        model = joblib.load(artefato, mmap_mode='r')
+        _MODELOS[hash_origem] = model
+        return model
+
+
+def artefato_de(model):
+    """
+    Artefato de onde um modelo carregado por `carregar` foi aberto.
+
+    Returns:
+        Path ou None se o modelo não veio do registro
+    """
+    with _LOCK:
+        for hash_origem, carregado in _MODELOS.items():
+            if carregado is model:
+                return _caminhos(hash_origem)[0]
+    return None
+
+
+def abrir_artefato(artefato):
+    """
+    Abre um artefato já publicado em memory map, uma única vez por processo.
+
+    Usado pelos processos de escoragem: todos mapeiam o mesmo arquivo somente
+    leitura em vez de receber uma cópia serializada do modelo.
+    """
+    chave = str(Path(artefato).resolve())
+    with _LOCK:
+        if chave not in _MODELOS:
+            _MODELOS[chave] = joblib.load(artefato, mmap_mode='r')
+        return _MODELOS[chave]
+
+
+def ler_assinatura(model_path):
+    """
+    Lê a assinatura gravada junto ao artefato do modelo.
+
+    Returns:
+        dict ou None se o modelo ainda não tiver assinatura
+    """
+    hash_origem = _hash_origem(model_path)
+    with _LOCK:
+        if hash_origem not in _ASSINATURAS:
+            caminho = _caminho_assinatura(hash_origem)
+            if not caminho.exists():
+                return None
+            try:
+                _ASSINATURAS[hash_origem] = json.loads(caminho.read_text())
+            except ValueError:
+                return None
+        return _ASSINATURAS[hash_origem]
+
+
+def salvar_assinatura(model_path, dados):
+    """Grava a assinatura de um modelo já registrado (ex: artefatos anteriores à assinatura)."""
+    with _LOCK:
+        _gravar_assinatura(_hash_origem(model_path), dados)
+
+
+def limpar_cache():
+    """Esquece os modelos carregados neste processo (os artefatos em disco permanecem)."""
+    with _LOCK:
+        _MODELOS.clear()
+        _ASSINATURAS.clear()
+        _HASHES.clear()
@@ -0,0 +1,7 @@
+"""Valores padrão da escoragem, sem dependências pesadas (usados também pela linha de comando)."""
+
+# Probabilidade a partir da qual o registro é da classe positiva
+LIMIAR_PADRAO = 0.5
+
+# Registros por bloco na escoragem em lote
+CHUNK_PADRAO = 100_000
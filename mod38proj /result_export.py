@@ -0,0 +1,95 @@
+"""
+Resultados da escoragem em disco e arquivos de download.
+
+Os resultados são gravados uma única vez em Parquet durante a escoragem; o CSV
+compactado só é gerado quando pedido, lendo o Parquet em lotes.
+"""
+import gzip
+import os
+import time
+import uuid
+from pathlib import Path
+
+# Diretório dos resultados (configurável por variável de ambiente)
+RESULTADOS_DIR = Path(os.environ.get("PREDICTX_RESULTS_DIR", ".cache/resultados"))
+
+# Resultados mais antigos que isso (ex: de sessões encerradas) são apagados
+RETENCAO_HORAS = float(os.environ.get("PREDICTX_RESULTS_TTL_HOURS", 24))
+
+# {formato: (extensão, mime)}
+FORMATOS_DOWNLOAD = {
+    'parquet': ('.parquet', 'application/octet-stream'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+}
+
+_LOTE_CSV = 100_000
+
+
+def limpar_antigos(horas=RETENCAO_HORAS):
+    """
+    Apaga resultados e downloads modificados há mais de `horas`.
+
+    Returns:
+        int: Quantidade de arquivos apagados
+    """
+    if not RESULTADOS_DIR.exists():
+        return 0
+    limite = time.time() - horas * 3600
+    apagados = 0
+    for arquivo in RESULTADOS_DIR.iterdir():
+        try:
+            if arquivo.is_file() and arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+                apagados += 1
+        except FileNotFoundError:
+            # Apagado por outra sessão ao mesmo tempo
+            continue
+    return apagados
+
+
+def novo_destino():
+    """Caminho de um novo arquivo Parquet de resultados (limpando os expirados)."""
+    RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+    limpar_antigos()
+    return RESULTADOS_DIR / f"{uuid.uuid4().hex}.parquet"
+
+
+def _caminho_download(caminho_parquet, formato):
+    caminho = Path(caminho_parquet)
+    if formato == 'parquet':
+        return caminho
+    return caminho.with_name(caminho.stem + FORMATOS_DOWNLOAD[formato][0])
+
+
+def preparar_download(caminho_parquet, formato='parquet'):
+    """
+    Retorna o arquivo de download no formato pedido, gerando-o na primeira vez.
+
+    Args:
+        caminho_parquet: Parquet com os resultados da escoragem
+        formato: Uma das chaves de FORMATOS_DOWNLOAD
+
+    Returns:
+        Path: Arquivo pronto para download
+    """
+    import pyarrow.parquet as pq
+
+    destino = _caminho_download(caminho_parquet, formato)
+    if destino.exists():
+        return destino
+
+    temporario = destino.with_name(destino.name + ".tmp")
+    arquivo = pq.ParquetFile(caminho_parquet)
+    with gzip.open(temporario, 'wt', encoding='utf-8', newline='') as saida:
+        cabecalho = True
+        for lote in arquivo.iter_batches(batch_size=_LOTE_CSV):
+            lote.to_pandas().to_csv(saida, header=cabecalho, index=False)
+            cabecalho = False
+    os.replace(temporario, destino)
+    return destino
+
+
+def remover(caminho_parquet):
+    """Apaga os resultados e os arquivos de download gerados a partir deles."""
+    for formato in FORMATOS_DOWNLOAD:
+        _caminho_download(caminho_parquet, formato).unlink(missing_ok=True)
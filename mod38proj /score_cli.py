@@ -0,0 +1,64 @@
+"""
+Escoragem em linha de comando, sem Streamlit.
+
+Exemplo:
+    python score_cli.py clientes.csv resultados.parquet --modelo model_final.pkl --processos 4
+"""
+import argparse
+import sys
+
+# Só os padrões no carregamento: pandas/sklearn são importados depois de ler os
+# argumentos, para que --help e erros de uso respondam na hora
+import padroes
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Escora um arquivo CSV/Parquet com o modelo de crédito e grava os resultados."
+    )
+    parser.add_argument("entrada", help="Arquivo de entrada (.csv ou .parquet)")
+    parser.add_argument("saida", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--modelo", default="model_final.pkl", help="Arquivo do modelo (padrão: model_final.pkl)")
+    parser.add_argument("--formato", choices=["csv", "parquet"], help="Formato de saída (padrão: pela extensão)")
+    parser.add_argument("--chunksize", type=int, default=padroes.CHUNK_PADRAO,
+                        help=f"Registros por bloco (padrão: {padroes.CHUNK_PADRAO})")
+    parser.add_argument("--processos", type=int, default=1, help="Processos em paralelo (padrão: 1)")
+    parser.add_argument("--limiar", type=float, default=padroes.LIMIAR_PADRAO,
+                        help=f"Limiar de classificação (padrão: {padroes.LIMIAR_PADRAO})")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Não mostra o progresso")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    import scoring
+
+    def progresso(linhas):
+        print(f"\r{linhas:,} registros escorados", end="", file=sys.stderr, flush=True)
+
+    try:
+        execucao = scoring.escorar_arquivo(
+            args.entrada,
+            args.saida,
+            args.modelo,
+            formato=args.formato,
+            chunksize=args.chunksize,
+            n_processos=args.processos,
+            limiar=args.limiar,
+            progresso=None if args.quiet else progresso
+        )
+    except Exception as e:
+        print(f"Erro durante a escoragem: {e}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(
+        f"{execucao.linhas:,} registros escorados em {execucao.segundos:.2f}s "
+        f"({execucao.linhas_por_segundo:,.0f} registros/s) -> {args.saida}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""
+Núcleo da escoragem de crédito, sem dependência do Streamlit.
+
+Pode ser importado por scripts, pelo servidor de escoragem e pela linha de comando
+(score_cli.py); a interface credit_scoring_app.py usa as mesmas funções.
+"""
+import sys
+import warnings
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+import batch_scoring
+import model_registry
+
+# ============================================================================
+# CLASSES E FUNÇÕES AUXILIARES
+# ============================================================================
+
+class OutlierRemover(BaseEstimator, TransformerMixin):
+    """
+    Remove outliers usando IQR ou Z-score
+
+    Limites e medianas são aprendidos no fit, então o resultado não depende de como
+    os dados são divididos em blocos na escoragem.
+    """
+    def __init__(self, method='iqr', factor=1.5):
+        self.method = method
+        self.factor = factor
+        self.bounds_ = {}
+    
+    def fit(self, X, y=None):
+        self.medians_ = {}
+        if isinstance(X, pd.DataFrame):
+            numeric_cols = X.select_dtypes(include=[np.number]).columns
+            if self.method == 'iqr' and len(numeric_cols):
+                valores = X[numeric_cols].to_numpy(dtype=np.float64)
+                Q1, medianas, Q3 = np.nanquantile(valores, [0.25, 0.5, 0.75], axis=0)
+                IQR = Q3 - Q1
+                for i, col in enumerate(numeric_cols):
+                    self.bounds_[col] = (Q1[i] - self.factor * IQR[i], Q3[i] + self.factor * IQR[i])
+                    self.medians_[col] = medianas[i]
+        return self
+    
+    def transform(self, X):
+        if not isinstance(X, pd.DataFrame):
+            return X.copy()
+
+        colunas = [col for col in self.bounds_ if col in X.columns]
+        if not colunas:
+            return X.copy()
+
+        valores = X[colunas].to_numpy(dtype=np.float64)
+        inferior = np.array([self.bounds_[col][0] for col in colunas])
+        superior = np.array([self.bounds_[col][1] for col in colunas])
+        medianas = getattr(self, 'medians_', None)
+        if medianas:
+            medianas = np.array([medianas[col] for col in colunas])
+        else:
+            # Modelos gravados antes das medianas aprendidas no fit
+            medianas = np.nanmedian(valores, axis=0)
+
+        fora = (valores < inferior) | (valores > superior)
+        X_transformed = X.copy()
+        X_transformed[colunas] = np.where(fora, medianas, valores)
+        return X_transformed
+
+def _registrar_classes_main():
+    """Permite abrir modelos gravados em notebooks/scripts que referenciam __main__.OutlierRemover"""
+    main = sys.modules.get('__main__')
+    if main is not None and not hasattr(main, 'OutlierRemover'):
+        main.OutlierRemover = OutlierRemover
+
+def load_model(model_path):
+    """Carrega o modelo treinado (uma vez por processo, via model_registry)"""
+    try:
+        model = model_registry.carregar(
+            model_path, preparar=_registrar_classes_main, assinar=gerar_assinatura
+        )
+        return model, True
+    except Exception as e:
+        return str(e), False
+
+def diagnose_model(model):
+    """Analisa o modelo para descobrir o formato esperado dos dados"""
+    diagnosis = {}
+    
+    try:
+        preprocessor = model.named_steps['preprocessor']
+        
+        if hasattr(preprocessor, 'transformers_'):
+            for name, transformer, columns in preprocessor.transformers_:
+                if name == 'cat':
+                    onehot_encoder = transformer.named_steps['onehot']
+                    if hasattr(onehot_encoder, 'categories_'):
+                        diagnosis['categorical_columns'] = columns
+                        diagnosis['categories_per_column'] = {}
+                        for i, col in enumerate(columns):
+                            diagnosis['categories_per_column'][col] = list(onehot_encoder.categories_[i])
+                
+                elif name == 'num':
+                    diagnosis['numerical_columns'] = columns
+        
+        diagnosis['success'] = True
+        
+    except Exception as e:
+        diagnosis['success'] = False
+        diagnosis['error'] = str(e)
+    
+    return diagnosis
+
+def _valor_json(valor):
+    # Escalares numpy (np.int64, np.bool_...) viram tipos nativos do Python
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def gerar_assinatura(model):
+    """
+    Gera a assinatura do modelo: ordem e tipo das colunas e vocabulário de cada categórica.
+
+    É gravada uma única vez, junto ao artefato do modelo (ver model_registry), e lida
+    nas próximas cargas sem percorrer o pipeline.
+    """
+    diagnosis = diagnose_model(model)
+    assinatura = {'versao': 1, 'success': diagnosis['success']}
+    if not diagnosis['success']:
+        assinatura['error'] = diagnosis['error']
+        return assinatura
+
+    categoricas = [str(col) for col in diagnosis.get('categorical_columns', [])]
+    numericas = [str(col) for col in diagnosis.get('numerical_columns', [])]
+    vocabularios = {
+        str(col): [_valor_json(valor) for valor in valores]
+        for col, valores in diagnosis.get('categories_per_column', {}).items()
+    }
+    colunas = [str(col) for col in getattr(model, 'feature_names_in_', [])] or categoricas + numericas
+
+    assinatura.update({
+        'colunas': colunas,
+        'dtypes': {
+            **{col: 'categorica' for col in categoricas},
+            **{col: 'numerica' for col in numericas},
+        },
+        'categorical_columns': categoricas,
+        'numerical_columns': numericas,
+        'categories_per_column': vocabularios,
+        'tipos_categoricos': {
+            col: 'bool' if any(val in valores for val in [True, False]) else 'texto'
+            for col, valores in vocabularios.items()
+        },
+    })
+    return assinatura
+
+def carregar_assinatura(model_path):
+    """
+    Lê a assinatura gravada com o modelo, no mesmo formato do diagnose_model.
+
+    Os vocabulários viram frozensets, para validação com busca O(1).
+    """
+    assinatura = model_registry.ler_assinatura(model_path)
+    if assinatura is None:
+        # Artefato registrado antes da assinatura: gera agora e grava para as próximas cargas
+        model, sucesso = load_model(model_path)
+        if not sucesso:
+            return {'success': False, 'error': model}
+        assinatura = gerar_assinatura(model)
+        model_registry.salvar_assinatura(model_path, assinatura)
+
+    diagnosis = dict(assinatura)
+    if 'categories_per_column' in diagnosis:
+        diagnosis['categories_per_column'] = {
+            col: frozenset(valores) for col, valores in diagnosis['categories_per_column'].items()
+        }
+    return diagnosis
+
+# Valores aceitos como booleanos nas colunas em que o modelo espera True/False
+MAPA_BOOLEANO = {
+    'Y': True, 'N': False, 'S': True,
+    'YES': True, 'NO': False, 'SIM': True, 'NAO': False, 'NÃO': False,
+    '1': True, '0': False,
+    'TRUE': True, 'FALSE': False, 'T': True, 'F': False,
+}
+MAPA_POSSE = {'False': 'N', 'True': 'S', False: 'N', True: 'S'}
+MAPEAMENTO_EDUCACAO = {
+    'Secundário': 'Médio',
+    'Primário': 'Fundamental',
+}
+COLUNAS_CATEGORICAS_PADRAO = ['sexo', 'posse_de_veiculo', 'posse_de_imovel',
+                              'tipo_renda', 'educacao', 'estado_civil', 'tipo_residencia']
+COLUNAS_PADRONIZADAS = ['posse_de_veiculo', 'posse_de_imovel', 'educacao']
+COLUNAS_NUMERICAS_PADRAO = ['qtd_filhos', 'idade', 'tempo_emprego',
+                            'qt_pessoas_residencia', 'renda']
+
+# Limite de valores distintos memorizados por coluna entre blocos
+_LIMITE_MEMO = 100_000
+
+class PlanoPreprocessamento:
+    """
+    Pré-processamento compilado uma única vez por diagnóstico de modelo.
+
+    As colunas categóricas são convertidas pelos valores distintos (codes/uniques) e
+    expandidas com um único take, sem criar colunas de texto intermediárias.
+    """
+    def __init__(self, model_diagnosis=None):
+        sucesso = bool(model_diagnosis and model_diagnosis.get('success'))
+        esperadas = model_diagnosis.get('categories_per_column', {}) if sucesso else {}
+
+        if model_diagnosis and 'categorical_columns' in model_diagnosis:
+            colunas_categoricas = model_diagnosis['categorical_columns']
+            colunas_numericas = model_diagnosis['numerical_columns']
+        else:
+            colunas_categoricas = COLUNAS_CATEGORICAS_PADRAO
+            colunas_numericas = COLUNAS_NUMERICAS_PADRAO
+
+        self.colunas = [col for col in list(colunas_categoricas) + list(colunas_numericas)
+                        if col != 'id_cliente']
+        # Só as colunas que de fato mudam passam pela conversão por valores distintos
+        self.tipos = {}
+        for col in COLUNAS_PADRONIZADAS:
+            self.tipos[col] = 'livre'
+        tipos_assinatura = model_diagnosis.get('tipos_categoricos', {}) if sucesso else {}
+        for col, categorias in esperadas.items():
+            if col in tipos_assinatura:
+                self.tipos[col] = tipos_assinatura[col]
+            elif any(val in categorias for val in [True, False]):
+                self.tipos[col] = 'bool'
+            else:
+                self.tipos[col] = 'texto'
+        self.vocabularios = {col: frozenset(categorias) for col, categorias in esperadas.items()}
+        self._memo = {col: {} for col in self.tipos}
+
+    def _converter_valor(self, col, valor):
+        """Converte um único valor distinto (aplicado só aos uniques de cada coluna)"""
+        if col in ('posse_de_veiculo', 'posse_de_imovel'):
+            valor = MAPA_POSSE.get(valor, valor)
+        if col == 'educacao':
+            valor = MAPEAMENTO_EDUCACAO.get(valor, valor)
+
+        tipo = self.tipos[col]
+        if tipo == 'bool':
+            return MAPA_BOOLEANO.get(str(valor).upper(), False)
+        if tipo == 'texto':
+            texto = str(valor)
+            return 'missing' if texto in ('nan', 'None') else texto
+        return valor
+
+    def _converter_categoria(self, col, serie):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codes = serie.cat.codes.to_numpy()
+            uniques = list(serie.cat.categories) + [np.nan]
+            codes = np.where(codes < 0, len(uniques) - 1, codes)
+        else:
+            codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+
+        memo = self._memo[col]
+        tabela = np.empty(len(uniques), dtype=object)
+        for i, valor in enumerate(uniques):
+            # O tipo entra na chave para 1, 1.0 e True não colidirem no dicionário
+            chave = (type(valor), valor)
+            try:
+                convertido = memo[chave]
+            except (KeyError, TypeError):
+                convertido = self._converter_valor(col, valor)
+                if len(memo) < _LIMITE_MEMO:
+                    try:
+                        memo[chave] = convertido
+                    except TypeError:
+                        pass
+            tabela[i] = convertido
+        return pd.Series(tabela[codes], index=serie.index, name=col)
+
+    def transformar(self, df):
+        """
+        Aplica o plano em uma única passada pelas colunas usadas pelo modelo.
+
+        Returns:
+            Tuple: (DataFrame só com as colunas do modelo, lista dessas colunas)
+        """
+        colunas = [col for col in self.colunas if col in df.columns]
+        saida = {}
+        for col in colunas:
+            serie = df[col]
+            if col in self.tipos:
+                serie = self._converter_categoria(col, serie)
+            if col in COLUNAS_NUMERICAS_PADRAO:
+                serie = pd.to_numeric(serie, errors='coerce').fillna(0)
+            elif col == 'data_ref':
+                try:
+                    serie = pd.to_datetime(serie)
+                except (TypeError, ValueError):
+                    warnings.warn("Não foi possível converter a coluna 'data_ref'")
+            saida[col] = serie
+        return pd.DataFrame(saida, index=df.index), colunas
+
+def compilar_plano(model_diagnosis=None):
+    """Compila o plano de pré-processamento para o diagnóstico do modelo"""
+    return PlanoPreprocessamento(model_diagnosis)
+
+def preprocess_data(df, model_diagnosis=None, plano=None):
+    """Aplica pré-processamento nos dados baseado no diagnóstico do modelo"""
+    if plano is None:
+        plano = compilar_plano(model_diagnosis)
+    return plano.transformar(df)
+
+def generate_score_report(df_original, predictions, probabilities):
+    """Gera relatório de escoragem"""
+    df_resultado = df_original.copy()
+    df_resultado['score_probabilidade'] = probabilities
+    df_resultado['score_classe'] = predictions
+    df_resultado['score_rating'] = pd.cut(
+        probabilities,
+        bins=[0, 0.1, 0.3, 0.5, 0.7, 1.0],
+        labels=['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo']
+    )
+    
+    return df_resultado
+
+def validar_entrada(df, model_diagnosis=None, plano=None):
+    """
+    Confere os dados com o que o modelo espera, sem escorar.
+
+    Returns:
+        Dict: {'colunas_faltantes': [...], 'categorias_desconhecidas': {coluna: [valores]}}
+    """
+    if plano is None:
+        plano = compilar_plano(model_diagnosis)
+
+    desconhecidas = {}
+    for col, vocabulario in plano.vocabularios.items():
+        if col not in df.columns:
+            continue
+        # Só os valores distintos passam pelo plano: o app valida a cada rerun
+        distintos, colunas = plano.transformar(df[[col]].drop_duplicates())
+        if col in colunas:
+            novos = [valor for valor in pd.unique(distintos[col]) if valor not in vocabulario]
+            if novos:
+                desconhecidas[col] = novos
+    return {
+        'colunas_faltantes': [col for col in plano.colunas if col not in df.columns],
+        'categorias_desconhecidas': desconhecidas,
+    }
+
+def preparar_entrada(df, model_diagnosis=None, plano=None):
+    """Pré-processa um bloco e retorna apenas as colunas usadas pelo modelo"""
+    df_processed, colunas_disponiveis = preprocess_data(df, model_diagnosis, plano)
+    return df_processed[colunas_disponiveis]
+
+# ============================================================================
+# ESCORAGEM DE ARQUIVOS
+# ============================================================================
+
+def escorar_arquivo(caminho_entrada, caminho_saida, model_path, formato=None,
+                    chunksize=batch_scoring.CHUNK_PADRAO, n_processos=1,
+                    limiar=batch_scoring.LIMIAR_PADRAO, progresso=None):
+    """
+    Escora um arquivo CSV ou Parquet e grava os resultados bloco a bloco.
+
+    Returns:
+        batch_scoring.ResultadoEscoragem
+    """
+    model, sucesso = load_model(model_path)
+    if not sucesso:
+        raise RuntimeError(f"Erro ao carregar modelo: {model}")
+
+    plano = compilar_plano(carregar_assinatura(model_path))
+    return batch_scoring.escorar_em_blocos(
+        model,
+        ler_blocos(caminho_entrada, chunksize),
+        preparar=partial(preparar_entrada, plano=plano),
+        relatorio=generate_score_report,
+        limiar=limiar,
+        n_processos=n_processos,
+        destino=caminho_saida,
+        formato=formato,
+        manter_resultado=False,
+        progresso=progresso
+    )
+
+def ler_blocos(caminho, chunksize=batch_scoring.CHUNK_PADRAO):
+    """Lê um arquivo CSV ou Parquet em blocos de linhas"""
+    caminho = str(caminho)
+    if caminho.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(caminho)
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, chunksize=chunksize)
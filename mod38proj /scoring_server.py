@@ -0,0 +1,285 @@
+"""
+Servidor HTTP local de escoragem com micro-lotes.
+
+O modelo fica carregado em memória e as requisições simultâneas de um único cliente
+são agrupadas em micro-lotes, com uma chamada de predict_proba por lote.
+
+Exemplo:
+    python scoring_server.py --modelo model_final.pkl --porta 8000
+
+    curl -X POST localhost:8000/score -d '{"renda": 3500, "idade": 35, ...}'
+    curl localhost:8000/metrics
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import batch_scoring
+import scoring
+
+COLUNAS_RESULTADO = ['score_probabilidade', 'score_classe', 'score_rating']
+
+
+class _Pedido:
+    """Requisição aguardando a escoragem do seu micro-lote."""
+
+    def __init__(self, df):
+        self.df = df
+        self.inicio = time.perf_counter()
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+        # Marcado por quem desistiu de esperar (timeout): o pedido não é mais escorado
+        self.cancelado = False
+
+
+class ServicoEscoragem:
+    """
+    Mantém o modelo aquecido e escora pedidos em micro-lotes.
+
+    Args:
+        model: Modelo com predict_proba
+        model_diagnosis: Assinatura do modelo (ver scoring.carregar_assinatura)
+        max_lote: Quantidade máxima de registros por micro-lote
+        espera_ms: Tempo máximo de espera para completar um micro-lote
+        limiar: Limiar de classificação
+    """
+
+    def __init__(self, model, model_diagnosis=None, max_lote=64, espera_ms=5.0,
+                 limiar=batch_scoring.LIMIAR_PADRAO):
+        self.model = model
+        self.model_diagnosis = model_diagnosis
+        self.plano = scoring.compilar_plano(model_diagnosis)
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self.limiar = limiar
+        self._fila = queue.Queue()
+        self._latencias = deque(maxlen=10_000)
+        self._tamanhos_lote = deque(maxlen=10_000)
+        self._total = 0
+        self._erros = 0
+        self._lock = threading.Lock()
+        self._ativo = True
+        self._thread = threading.Thread(target=self._loop, name="micro-lotes", daemon=True)
+        self._thread.start()
+
+    def escorar(self, registros, timeout=30.0):
+        """Enfileira registros (dict ou lista de dicts) e aguarda o resultado."""
+        if not self._ativo:
+            raise RuntimeError("Serviço de escoragem encerrado")
+        df = pd.DataFrame(registros if isinstance(registros, list) else [registros])
+        pedido = _Pedido(df)
+        self._fila.put(pedido)
+        if not pedido.pronto.wait(timeout):
+            pedido.cancelado = True
+            raise TimeoutError("Tempo de escoragem esgotado")
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def _coletar_lote(self):
+        """
+        Espera o primeiro pedido e agrega os que chegarem até o lote encher ou o prazo acabar.
+
+        O marcador de encerramento (None) interrompe a coleta; pedidos cujo cliente
+        já desistiu ficam de fora.
+        """
+        primeiro = self._fila.get()
+        if primeiro is None:
+            return []
+        pedidos = [primeiro]
+        linhas = len(primeiro.df)
+        prazo = time.perf_counter() + self.espera
+        while linhas < self.max_lote:
+            restante = prazo - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                pedido = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if pedido is None:
+                break
+            pedidos.append(pedido)
+            linhas += len(pedido.df)
+        return [pedido for pedido in pedidos if not pedido.cancelado]
+
+    def _escorar_pedidos(self, pedidos):
+        df = pd.concat([pedido.df for pedido in pedidos], ignore_index=True)
+        resultado = batch_scoring.escorar_bloco(
+            self.model,
+            df,
+            lambda bloco: scoring.preparar_entrada(bloco, plano=self.plano),
+            scoring.generate_score_report,
+            self.limiar
+        )[COLUNAS_RESULTADO]
+
+        inicio = 0
+        for pedido in pedidos:
+            fim = inicio + len(pedido.df)
+            pedido.resultado = resultado.iloc[inicio:fim]
+            inicio = fim
+
+    @staticmethod
+    def _liberar(pedidos, erro):
+        """Devolve o erro a cada pedido e libera quem está esperando."""
+        for pedido in pedidos:
+            pedido.erro = erro
+            pedido.pronto.set()
+
+    def _esvaziar_fila(self):
+        pedidos = []
+        while True:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                return pedidos
+            if pedido is not None:
+                pedidos.append(pedido)
+
+    def _loop(self):
+        while self._ativo:
+            pedidos = self._coletar_lote()
+            if not self._ativo:
+                self._liberar(pedidos, RuntimeError("Serviço de escoragem encerrado"))
+                break
+            if not pedidos:
+                continue
+            try:
+                self._escorar_pedidos(pedidos)
+            except Exception:
+                # Um registro inválido não deve derrubar o lote: reescora um a um
+                for pedido in pedidos:
+                    try:
+                        self._escorar_pedidos([pedido])
+                    except Exception as e:
+                        pedido.erro = e
+
+            agora = time.perf_counter()
+            with self._lock:
+                self._tamanhos_lote.append(sum(len(p.df) for p in pedidos))
+                for pedido in pedidos:
+                    self._latencias.append(agora - pedido.inicio)
+                    self._total += 1
+                    self._erros += pedido.erro is not None
+            for pedido in pedidos:
+                pedido.pronto.set()
+
+        # Pedidos que chegaram durante o encerramento não ficam esperando o timeout
+        self._liberar(self._esvaziar_fila(), RuntimeError("Serviço de escoragem encerrado"))
+
+    def metricas(self):
+        """Latências (p50/p99 em ms), profundidade da fila e tamanho médio dos micro-lotes."""
+        with self._lock:
+            latencias = np.array(self._latencias) * 1000
+            tamanhos = np.array(self._tamanhos_lote)
+            total, erros = self._total, self._erros
+        return {
+            "requisicoes": total,
+            "erros": erros,
+            "fila": self._fila.qsize(),
+            "latencia_p50_ms": float(np.percentile(latencias, 50)) if len(latencias) else None,
+            "latencia_p99_ms": float(np.percentile(latencias, 99)) if len(latencias) else None,
+            "lote_medio": float(tamanhos.mean()) if len(tamanhos) else None,
+        }
+
+    def encerrar(self):
+        self._ativo = False
+        # Marcador só para acordar a thread de micro-lotes
+        self._fila.put(None)
+        self._thread.join(timeout=1)
+
+
+def _criar_handler(servico):
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._responder(200, servico.metricas())
+            elif self.path == "/health":
+                self._responder(200, {"status": "ok"})
+            else:
+                self._responder(404, {"erro": "Rota não encontrada"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._responder(404, {"erro": "Rota não encontrada"})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                registros = json.loads(self.rfile.read(tamanho) or b"null")
+                if not isinstance(registros, (dict, list)) or not registros:
+                    raise ValueError("Envie um registro (objeto JSON) ou uma lista de registros")
+            except ValueError as e:
+                self._responder(400, {"erro": str(e)})
+                return
+
+            try:
+                resultado = servico.escorar(registros)
+            except Exception as e:
+                self._responder(500, {"erro": str(e)})
+                return
+
+            linhas = json.loads(resultado.to_json(orient="records"))
+            self._responder(200, linhas if isinstance(registros, list) else linhas[0])
+
+        def log_message(self, format, *args):
+            # Sem log por requisição: as métricas ficam em /metrics
+            pass
+
+    return Handler
+
+
+def criar_servidor(servico, host="127.0.0.1", porta=8000):
+    """Cria o servidor HTTP (porta 0 escolhe uma porta livre, útil em testes)."""
+    return ThreadingHTTPServer((host, porta), _criar_handler(servico))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de escoragem de crédito.")
+    parser.add_argument("--modelo", default="model_final.pkl", help="Arquivo do modelo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--max-lote", type=int, default=64, help="Registros por micro-lote")
+    parser.add_argument("--espera-ms", type=float, default=5.0, help="Espera máxima para formar um micro-lote")
+    parser.add_argument("--limiar", type=float, default=batch_scoring.LIMIAR_PADRAO)
+    args = parser.parse_args(argv)
+
+    model, sucesso = scoring.load_model(args.modelo)
+    if not sucesso:
+        parser.error(f"Erro ao carregar modelo: {model}")
+
+    servico = ServicoEscoragem(
+        model,
+        scoring.carregar_assinatura(args.modelo),
+        max_lote=args.max_lote,
+        espera_ms=args.espera_ms,
+        limiar=args.limiar
+    )
+    servidor = criar_servidor(servico, args.host, args.porta)
+    print(f"Servidor de escoragem em http://{args.host}:{servidor.server_port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 from modules import (
     data_page,
     modelagem_page,
@@ -8,6 +9,9 @@ from modules import (
     data_config
 )
 
+# Copy-on-Write: etapas que retornam um novo DataFrame compartilham as colunas não alteradas
+pd.set_option("mode.copy_on_write", True)
+
 # Configurações iniciais da página
 def configurar_pagina():
     st.set_page_config(
@@ -22,6 +26,10 @@ def inicializar_session_state():
         st.session_state.pagina = "Data"
     if "df" not in st.session_state:
         st.session_state.df = None
+    if "dataset" not in st.session_state:
+        st.session_state.dataset = None
+    if 'duplicates_check' not in st.session_state:
+        st.session_state.duplicates_check = False
     if 'outlier_check' not in st.session_state:
         st.session_state.outlier_check = False
     if 'target' not in st.session_state:
@@ -34,12 +42,8 @@ def inicializar_session_state():
         st.session_state.normalization = False
     if 'dummies' not in st.session_state:
         st.session_state.dummies = False
-    if "df_treino" not in st.session_state:
-        st.session_state.df_treino = None
-    if "df_validation" not in st.session_state:
-        st.session_state.df_validation = None
-    if "df_test" not in st.session_state:
-        st.session_state.df_test = None
+    if "divisao" not in st.session_state:
+        st.session_state.divisao = None
     if "clean_df" not in st.session_state:
         st.session_state.clean_df = None
 
@@ -0,0 +1,148 @@
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from functions import compact_dtypes
+
+# Quantidade de linhas lidas por bloco no modo de leitura em blocos
+CHUNK_ROWS = 250_000
+
+# Extensões que suportam leitura em blocos
+STREAMING_EXTENSIONS = ('.csv', '.json', '.jsonl', '.parquet')
+
+
+class LeituraEmBlocosIndisponivel(ValueError):
+    """O arquivo tem formato suportado, mas não pode ser lido em blocos (ex: JSON em lista)."""
+
+
+def _downcast_chunk(bloco, downcast_floats=True, limite_cardinalidade=compact_dtypes.LIMITE_CARDINALIDADE):
+    """
+    Reduz os tipos de um bloco recém-lido para economizar memória.
+
+    Inteiros e floats são rebaixados para o menor tipo que comporta os valores e
+    colunas de texto repetitivas viram 'category' (unidas depois na montagem do
+    DataFrame), com a mesma regra de cardinalidade de compact_dtypes.
+    """
+    for col in bloco.columns:
+        serie = bloco[col]
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+        if pd.api.types.is_integer_dtype(serie):
+            bloco[col] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie) and downcast_floats:
+            bloco[col] = pd.to_numeric(serie, downcast='float')
+        elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            # Colunas de alta cardinalidade (ex: IDs) ficariam maiores como categoria
+            if len(serie) and serie.nunique() / len(serie) <= limite_cardinalidade:
+                bloco[col] = serie.astype('category')
+    return bloco
+
+
+def _montar_dataframe(blocos):
+    """Concatena os blocos coluna a coluna, unindo as categorias sem voltar para object."""
+    if not blocos:
+        return pd.DataFrame()
+    if len(blocos) == 1:
+        return blocos[0].reset_index(drop=True)
+
+    colunas = {}
+    for col in blocos[0].columns:
+        partes = [bloco[col] for bloco in blocos]
+        if all(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            try:
+                colunas[col] = pd.Series(union_categoricals(partes, ignore_order=True), name=col)
+                continue
+            except TypeError:
+                # Categorias com tipos diferentes entre blocos: cai para a concatenação comum
+                pass
+        colunas[col] = pd.concat(partes, ignore_index=True)
+    return pd.DataFrame(colunas)
+
+
+def _blocos_texto(arquivo, leitor, tamanho):
+    """Percorre um leitor de CSV/JSON lines informando a fração do arquivo já consumida."""
+    for bloco in leitor:
+        fracao = arquivo.tell() / tamanho if tamanho else 0.0
+        yield bloco, min(fracao, 1.0)
+
+
+def _blocos_parquet(arquivo):
+    """Percorre um arquivo Parquet por row group."""
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(arquivo)
+    total = parquet.num_row_groups
+    for i in range(total):
+        yield parquet.read_row_group(i).to_pandas(), (i + 1) / total
+
+
+def _verificar_json_lines(arquivo):
+    """Garante que o JSON está no formato JSON lines (um registro por linha)."""
+    inicio = arquivo.read(1024).lstrip()
+    arquivo.seek(0)
+    if inicio[:1] in (b'[', '['):
+        raise LeituraEmBlocosIndisponivel("JSON em formato de lista não suporta leitura em blocos; use JSON lines")
+
+
+def iterar_blocos(arquivo, nome_arquivo, chunksize=CHUNK_ROWS, tamanho=None):
+    """
+    Gera os blocos de um arquivo sem carregá-lo inteiro na memória.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo (ex: UploadedFile do Streamlit)
+        nome_arquivo: Nome do arquivo, usado para identificar o formato
+        chunksize: Quantidade de linhas por bloco (CSV e JSON lines)
+        tamanho: Tamanho do arquivo em bytes, usado para o progresso
+
+    Yields:
+        Tuple: (bloco, fracao_lida)
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            yield from iterar_blocos(f, nome_arquivo, chunksize, tamanho or os.path.getsize(arquivo))
+        return
+
+    nome = nome_arquivo.lower()
+    if nome.endswith('.parquet'):
+        yield from _blocos_parquet(arquivo)
+    elif nome.endswith('.csv'):
+        leitor = pd.read_csv(arquivo, chunksize=chunksize)
+        yield from _blocos_texto(arquivo, leitor, tamanho)
+    elif nome.endswith(('.json', '.jsonl')):
+        _verificar_json_lines(arquivo)
+        leitor = pd.read_json(arquivo, lines=True, chunksize=chunksize)
+        yield from _blocos_texto(arquivo, leitor, tamanho)
+    else:
+        raise ValueError(f"Formato sem suporte à leitura em blocos: {nome_arquivo}")
+
+
+def ler_em_blocos(arquivo, nome_arquivo, chunksize=CHUNK_ROWS, tamanho=None,
+                  progresso=None, compactar=True, downcast_floats=True):
+    """
+    Lê um arquivo grande em blocos, compactando cada bloco antes de guardá-lo.
+
+    O pico de memória fica limitado a um bloco bruto mais o DataFrame já compactado,
+    independente do tamanho do arquivo.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo
+        nome_arquivo: Nome do arquivo, usado para identificar o formato
+        chunksize: Quantidade de linhas por bloco
+        tamanho: Tamanho do arquivo em bytes (para o progresso)
+        progresso: Função opcional chamada com (fracao_lida, linhas_lidas)
+        compactar: Se False, os blocos são mantidos com os tipos lidos
+        downcast_floats: Se True, rebaixa floats para float32
+
+    Returns:
+        pd.DataFrame (compactado se `compactar`)
+    """
+    blocos = []
+    linhas = 0
+    for bloco, fracao in iterar_blocos(arquivo, nome_arquivo, chunksize, tamanho):
+        blocos.append(_downcast_chunk(bloco, downcast_floats) if compactar else bloco)
+        linhas += len(bloco)
+        if progresso is not None:
+            progresso(fracao, linhas)
+
+    return _montar_dataframe(blocos)
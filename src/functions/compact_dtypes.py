@@ -0,0 +1,101 @@
+import pandas as pd
+
+# Valores reconhecidos como flags (comparados em maiúsculas)
+FLAGS_VERDADEIRO = {'S', 'SIM', 'Y', 'YES', 'T', 'TRUE', '1'}
+FLAGS_FALSO = {'N', 'NAO', 'NÃO', 'NO', 'F', 'FALSE', '0'}
+
+# Colunas de texto com até esta proporção de valores únicos viram 'category'
+LIMITE_CARDINALIDADE = 0.5
+
+
+def memoria_mb(df):
+    """Retorna a memória ocupada pelo DataFrame em MB (incluindo o conteúdo dos textos)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def _valores_distintos(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return list(serie.cat.categories)
+    return list(serie.dropna().unique())
+
+
+def converter_flag(serie):
+    """
+    Converte uma coluna de flags (S/N, Y/N, True/False, ...) para bool.
+
+    Returns:
+        pd.Series booleana ou None se a coluna não for uma flag
+    """
+    if serie.hasnans:
+        return None
+    valores = _valores_distintos(serie)
+    if not 1 <= len(valores) <= 2:
+        return None
+
+    mapa = {}
+    for valor in valores:
+        texto = str(valor).strip().upper()
+        if texto in FLAGS_VERDADEIRO:
+            mapa[valor] = True
+        elif texto in FLAGS_FALSO:
+            mapa[valor] = False
+        else:
+            return None
+    return serie.map(mapa).astype(bool)
+
+
+def compactar_coluna(serie, downcast_floats=True, limite_cardinalidade=LIMITE_CARDINALIDADE):
+    """Retorna a coluna com o tipo mais compacto que preserva os valores."""
+    if pd.api.types.is_bool_dtype(serie):
+        return serie
+
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast='integer')
+
+    if pd.api.types.is_float_dtype(serie):
+        return pd.to_numeric(serie, downcast='float') if downcast_floats else serie
+
+    if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(serie) \
+            or pd.api.types.is_string_dtype(serie):
+        flag = converter_flag(serie)
+        if flag is not None:
+            return flag
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            return serie.cat.remove_unused_categories()
+        if len(serie) and serie.nunique() / len(serie) <= limite_cardinalidade:
+            return serie.astype('category')
+
+    return serie
+
+
+def compactar_dataframe(df, downcast_floats=True, limite_cardinalidade=LIMITE_CARDINALIDADE):
+    """
+    Reduz o uso de memória do DataFrame.
+
+    - Inteiros e floats são rebaixados para o menor tipo que comporta os valores
+    - Flags de texto (S/N, True/False, ...) viram bool
+    - Colunas de texto com poucos valores distintos viram 'category'
+
+    Args:
+        df: DataFrame pandas
+        downcast_floats: Se True, rebaixa floats para float32
+        limite_cardinalidade: Proporção máxima de valores únicos para virar 'category'
+
+    Returns:
+        Tuple: (df_compacto, memoria_antes_mb, memoria_depois_mb)
+    """
+    antes = memoria_mb(df)
+    colunas = {
+        col: compactar_coluna(df[col], downcast_floats, limite_cardinalidade)
+        for col in df.columns
+    }
+    df_compacto = pd.DataFrame(colunas, index=df.index)
+    return df_compacto, antes, memoria_mb(df_compacto)
+
+
+def preencher_categoria(serie, valor):
+    """fillna que também funciona em colunas 'category' (adiciona o valor às categorias)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype) and pd.notna(valor) \
+            and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
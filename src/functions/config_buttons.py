@@ -38,6 +38,7 @@ def config_buttons():
                 if st.session_state.split:            
                     if st.button("Alterar spliting"):
                         st.session_state.split = None
+                        st.session_state.divisao = None
                         st.rerun()
 
 
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
+from functions import split_indices
+
 
 def split_data_by_percentage():
     val, test = st.columns(2)
@@ -28,28 +30,118 @@ def split_data_by_percentage():
         "test": test_val
     }
 
-def split_data_by_column(df, colunas):
-    colunas_temporais = [col for col in colunas if 
+def mostrar_tamanhos(indices, dobras=None):
+    """Tamanho de cada partição (e número de dobras), sem materializar os dados."""
+    colunas = st.columns(4 if dobras else 3)
+    colunas[0].metric("Registros de treino", len(indices['treino']))
+    colunas[1].metric("Registros de validação", len(indices['validacao']))
+    colunas[2].metric("Registros de teste", len(indices['teste']))
+    if dobras:
+        colunas[3].metric("Dobras de validação cruzada", len(dobras))
+
+def colunas_temporais(df, colunas):
+    return [col for col in colunas if 
         pd.api.types.is_datetime64_any_dtype(df[col]) or
         'data' in col.lower() or 
         'date' in col.lower()
     ]
 
+def numero_dobras():
+    return int(st.number_input(
+        "Dobras para validação cruzada:", min_value=2, max_value=10, value=5,
+        help="Dobras calculadas sobre treino + validação, prontas para usar como cv= no scikit-learn"
+    ))
+
+def split_data_stratified(df):
+    """Divisão por porcentagem mantendo a proporção de cada classe do target."""
+    target = st.session_state.target
+    split = split_data_by_percentage()
+    dobras = numero_dobras()
+    indices = split_indices.split_estratificado(df[target], split['validation'], split['test'])
+    mostrar_tamanhos(indices)
+    st.caption(f"Proporção das classes de '{target}' preservada em todas as partições.")
+    return {**split, "method": "stratified", "column": target, "folds": dobras}
+
+# Coluna sugerida para a divisão por grupo, quando existir no dataset
+GRUPO_PADRAO = 'id_cliente'
+
+def split_data_by_group(df, colunas):
+    """Divisão por porcentagem em que as linhas de um mesmo grupo ficam na mesma partição."""
+    col_grupo = st.selectbox(
+        "Coluna de grupo:",
+        options=colunas,
+        index=colunas.index(GRUPO_PADRAO) if GRUPO_PADRAO in colunas else 0,
+        help="Ex: id_cliente — um mesmo cliente nunca aparece em treino e teste ao mesmo tempo"
+    )
+    split = split_data_by_percentage()
+    dobras = numero_dobras()
+    indices = split_indices.split_por_grupo(df[col_grupo], split['validation'], split['test'])
+    mostrar_tamanhos(indices)
+    st.caption(f"{df[col_grupo].nunique()} grupos distintos em '{col_grupo}'.")
+    return {**split, "method": "group", "column": col_grupo, "folds": dobras}
+
+def split_data_walk_forward(df, colunas):
+    """Divisão temporal com origem móvel: teste no fim, validação antes e dobras janela a janela."""
+    temporais = colunas_temporais(df, colunas)
+    if not temporais:
+        st.info("Nenhuma coluna de data encontrada para a divisão walk-forward.")
+        return None
+
+    col_divisao = st.selectbox("Coluna de data:", options=temporais, key="walk_forward_coluna")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_janelas = st.number_input("Janelas (dobras):", min_value=1, max_value=24, value=3)
+    with col2:
+        meses_janela = st.number_input("Meses por janela:", min_value=1, max_value=12, value=1)
+    with col3:
+        meses_treino = st.number_input(
+            "Meses de treino por dobra:", min_value=0, max_value=120, value=0,
+            help="0 = todo o histórico anterior à janela (origem expansível)"
+        )
+
+    params = {
+        "windows": int(n_janelas),
+        "months": int(meses_janela),
+        "train_months": int(meses_treino) or None,
+    }
+    ordem, datas = split_indices.ordem_da_versao(col_divisao)
+    try:
+        indices, dobras = split_indices.split_walk_forward(
+            ordem, datas, params['windows'], params['months'], params['train_months']
+        )
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None
+
+    mostrar_tamanhos(indices, dobras)
+    return {"method": "walk_forward", "column": col_divisao, **params}
+
+def split_data_by_column(df, colunas):
+    temporais = colunas_temporais(df, colunas)
+
     col_divisao = st.selectbox(
         "Selecione a coluna para divisão:",
         options=colunas,
-        index=colunas.index(colunas_temporais[0]) if colunas_temporais and colunas_temporais[0] in colunas else 0,
+        index=colunas.index(temporais[0]) if temporais and temporais[0] in colunas else 0,
         help="Coluna que define a divisão (ex: 'split_column' com valores 'train', 'val', 'test')"
     )
 
-    if col_divisao in colunas_temporais:
+    if col_divisao in temporais:
         return handle_temporal_split(df, col_divisao)
     else:
         return handle_categorical_split(col_divisao)
 
+def meses_disponiveis(serie):
+    """Meses presentes na coluna de data, em ordem, formatados como mm/aaaa só para exibição."""
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        # Coluna ainda em texto (etapa de datas não aplicada)
+        serie = pd.to_datetime(serie, dayfirst=True, errors='coerce')
+    periodos = np.sort(serie.dt.to_period('M').dropna().unique())
+    return [periodo.strftime('%m/%Y') for periodo in periodos]
+
 def handle_temporal_split(df, col_divisao):
 
-    datas_formatadas =[data[3:] for data in df['data_ref'].unique()]
+    datas_formatadas = meses_disponiveis(df[col_divisao])
 
     # Usar um prefixo único para as chaves baseado no nome da coluna
     key_prefix = f"{col_divisao}_"
@@ -74,6 +166,12 @@ def handle_temporal_split(df, col_divisao):
     )
     val_test_start_date = datas_formatadas[val_test_start_idx]
 
+    # Tamanhos das partições a cada ajuste dos cortes: a ordenação é reaproveitada
+    # e cada corte é uma busca binária
+    ordem, datas = split_indices.ordem_da_versao(col_divisao)
+    indices = split_indices.split_temporal(ordem, datas, train_end_date, val_test_start_date)
+    mostrar_tamanhos(indices)
+
     return {
         "method": "temporal",
         "column": col_divisao,
@@ -112,16 +210,28 @@ def data_splitting_options(df, colunas):
     with st.expander("✂️ **Divisão dos Dados (Train/Val/Test)**", expanded=True):
         metodo_divisao = st.radio(
             "Método de divisão:",
-            options=["Por porcentagem", "Por coluna específica"],
+            options=[
+                "Por porcentagem",
+                "Estratificada (target)",
+                "Por grupo",
+                "Walk-forward (temporal)",
+                "Por coluna específica",
+            ],
             horizontal=True,
             help="Escolha como dividir seus dados em conjuntos de treino, validação e teste"
         )
 
         if metodo_divisao == "Por porcentagem":
             split= split_data_by_percentage()
+        elif metodo_divisao == "Estratificada (target)":
+            split= split_data_stratified(df)
+        elif metodo_divisao == "Por grupo":
+            split= split_data_by_group(df, colunas)
+        elif metodo_divisao == "Walk-forward (temporal)":
+            split= split_data_walk_forward(df, colunas)
         else:
             split= split_data_by_column(df, colunas)
         
-        if st.button("Guardar divisão"):
+        if st.button("Guardar divisão", disabled=split is None):
             st.session_state.split = split
             st.rerun()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# Diretório e tamanho máximo do cache de datasets (configuráveis por variável de ambiente)
+CACHE_DIR = Path(os.environ.get("PREDICTX_CACHE_DIR", ".cache/datasets"))
+CACHE_MAX_MB = int(os.environ.get("PREDICTX_CACHE_MAX_MB", "2048"))
+
+_BLOCO_HASH = 8 * 1024 * 1024
+
+
+def hash_conteudo(arquivo):
+    """
+    Calcula o hash do conteúdo de um arquivo lendo-o em blocos.
+
+    Args:
+        arquivo: Objeto de arquivo binário (ex: UploadedFile do Streamlit)
+
+    Returns:
+        str: Hash hexadecimal do conteúdo
+    """
+    h = hashlib.blake2b(digest_size=16)
+    arquivo.seek(0)
+    for bloco in iter(lambda: arquivo.read(_BLOCO_HASH), b''):
+        h.update(bloco)
+    arquivo.seek(0)
+    return h.hexdigest()
+
+
+def chave_arquivo(arquivo, variante="padrao"):
+    """Gera a chave do cache a partir do conteúdo e da forma de leitura do arquivo."""
+    return f"{hash_conteudo(arquivo)}-{variante}"
+
+
+def _caminho(chave):
+    return CACHE_DIR / f"{chave}.feather"
+
+
+def ler_feather_mmap(caminho):
+    """Lê um arquivo Feather via memory map do Arrow, sem etapa de parsing."""
+    from pyarrow import feather
+
+    tabela = feather.read_table(str(caminho), memory_map=True)
+    return tabela.to_pandas()
+
+
+def carregar(chave):
+    """
+    Busca um DataFrame no cache.
+
+    Returns:
+        pd.DataFrame ou None se a chave não estiver no cache
+    """
+    caminho = _caminho(chave)
+    if not caminho.exists():
+        return None
+    try:
+        df = ler_feather_mmap(caminho)
+    except Exception:
+        # Arquivo corrompido ou de outra versão: descarta e força nova leitura
+        caminho.unlink(missing_ok=True)
+        return None
+    # Marca o acesso para a política LRU
+    os.utime(caminho)
+    return df
+
+
+def salvar(chave, df, limite_mb=None):
+    """
+    Grava um DataFrame no cache como Feather sem compressão (permite memory map).
+
+    Os tipos das colunas (incluindo categorias e inteiros reduzidos) são preservados
+    nos metadados pandas do schema Arrow.
+
+    Returns:
+        bool: True se o DataFrame foi gravado
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    destino = _caminho(chave)
+    temporario = destino.with_suffix(".tmp")
+    try:
+        df.reset_index(drop=True).to_feather(temporario, compression="uncompressed")
+        os.replace(temporario, destino)
+    except Exception:
+        # Ex: colunas com tipos mistos ou nomes não textuais, que o Feather não aceita
+        temporario.unlink(missing_ok=True)
+        return False
+
+    aplicar_limite(limite_mb)
+    return True
+
+
+def aplicar_limite(limite_mb=None):
+    """Remove os arquivos acessados há mais tempo até o cache caber no limite (LRU)."""
+    limite = (CACHE_MAX_MB if limite_mb is None else limite_mb) * 1024 ** 2
+    if not CACHE_DIR.exists():
+        return
+
+    arquivos = []
+    for caminho in CACHE_DIR.glob("*.feather"):
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, caminho))
+
+    arquivos.sort()
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in arquivos:
+        if total <= limite:
+            break
+        try:
+            caminho.unlink()
+            total -= tamanho
+        except OSError:
+            # Arquivo em uso por outra sessão
+            continue
+
+
+def limpar():
+    """Remove todos os datasets do cache."""
+    aplicar_limite(limite_mb=0)
+
+
+def carregar_arquivo(arquivo, leitor, variante="padrao"):
+    """
+    Carrega um arquivo usando o cache quando possível.
+
+    Args:
+        arquivo: Objeto de arquivo binário
+        leitor: Função que recebe o arquivo e retorna um DataFrame (ou None)
+        variante: Identifica a forma de leitura, para não misturar resultados diferentes
+
+    Returns:
+        Tuple: (DataFrame ou None, veio_do_cache)
+    """
+    chave = chave_arquivo(arquivo, variante)
+    df = carregar(chave)
+    if df is not None:
+        return df, True
+
+    df = leitor(arquivo)
+    if isinstance(df, pd.DataFrame):
+        salvar(chave, df)
+    return df, False
@@ -7,16 +7,20 @@ import numpy as np
 def optimization():
     with st.expander("❗ **Contagem e Porcentagem por Valor**", expanded=True):
         # Verificações de segurança
-        if 'df_treino' not in st.session_state or 'target' not in st.session_state:
+        divisao = st.session_state.get('divisao')
+        if divisao is None or 'target' not in st.session_state:
             st.error("Dados não carregados! Verifique o upload.")
             return
         
-        if st.session_state.target not in st.session_state.df_treino.columns:
+        if st.session_state.target not in divisao.colunas:
             st.error(f"Coluna '{st.session_state.target}' não encontrada!")
             return
 
+        # Só a coluna target do treino é lida para a contagem
+        y_treino = divisao.coluna('treino', st.session_state.target)
+
         # Calcula contagem e porcentagem
-        contagem = st.session_state.df_treino[st.session_state.target].value_counts(dropna=False)
+        contagem = y_treino.value_counts(dropna=False)
         porcentagem = (contagem / contagem.sum()) * 100
 
         # Exibe detalhamento por valor
@@ -48,8 +52,8 @@ def optimization():
             with col1:
                 if st.button("Undersampling"):
                     rus = RandomUnderSampler(random_state=42)
-                    X = st.session_state.df_treino.drop(columns=[st.session_state.target])
-                    y = st.session_state.df_treino[st.session_state.target]
+                    X = divisao.particao('treino').drop(columns=[st.session_state.target])
+                    y = y_treino
                     X_res, y_res = rus.fit_resample(X, y)
                     st.session_state.df_balanceado = pd.concat([X_res, y_res], axis=1)
                     st.success("Undersampling aplicado! Classe majoritária reduzida.")
@@ -57,19 +61,19 @@ def optimization():
             with col2:
                 if st.button("Oversampling (SMOTE)"):
                     smote = SMOTE(random_state=42)
-                    X = st.session_state.df_treino.drop(columns=[st.session_state.target])
-                    y = st.session_state.df_treino[st.session_state.target]
+                    X = divisao.particao('treino').drop(columns=[st.session_state.target])
+                    y = y_treino
                     X_res, y_res = smote.fit_resample(X, y)
                     st.session_state.df_balanceado = pd.concat([X_res, y_res], axis=1)
                     st.success("SMOTE aplicado! Classe minoritária aumentada.")
             
             with col3:
                 if st.button("Peso de Classes"):
-                    classes = np.unique(st.session_state.df_treino[st.session_state.target])
+                    classes = np.unique(y_treino)
                     pesos = class_weight.compute_class_weight(
                         'balanced',
                         classes=classes,
-                        y=st.session_state.df_treino[st.session_state.target]
+                        y=y_treino
                     )
                     st.session_state.pesos_classes = dict(zip(classes, pesos))
                     st.success(f"Pesos calculados: {st.session_state.pesos_classes}")
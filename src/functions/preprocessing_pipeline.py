@@ -0,0 +1,432 @@
+import re
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import KNNImputer
+from sklearn.pipeline import Pipeline
+
+from functions import compact_dtypes
+
+# Local padrão do pipeline exportado, ao lado do modelo
+PIPELINE_PATH = Path("model/preprocessing_pipeline.pkl")
+
+
+class MissingImputer(BaseEstimator, TransformerMixin):
+    """
+    Preenche valores faltantes com valores aprendidos no fit.
+
+    Args:
+        estrategias: Dicionário {coluna: método}, com método em
+            "Zero", "Média", "Mediana", "Moda" ou "Valor Personalizado"
+        valores: Dicionário {coluna: valor} usado pelo método "Valor Personalizado"
+    """
+    def __init__(self, estrategias=None, valores=None):
+        self.estrategias = estrategias
+        self.valores = valores
+
+    @staticmethod
+    def _calcular_valor(serie, metodo, valor):
+        if metodo == "Zero":
+            return 0
+        if metodo == "Média":
+            return serie.mean()
+        if metodo == "Mediana":
+            return serie.median()
+        if metodo == "Moda":
+            return serie.mode().iloc[0]
+        return valor
+
+    def fit(self, X, y=None):
+        valores = self.valores or {}
+        estrategias = self.estrategias or {}
+        self.valores_ = {}
+        # Médias e medianas de todas as colunas em uma única agregação por método
+        for metodo, agregacao in (("Média", "mean"), ("Mediana", "median")):
+            colunas = [col for col, m in estrategias.items() if m == metodo]
+            if colunas:
+                self.valores_.update(X[colunas].agg(agregacao).to_dict())
+        for col, metodo in estrategias.items():
+            if metodo in ("Média", "Mediana"):
+                continue
+            valor = self._calcular_valor(X[col], metodo, valores.get(col))
+            if valor is not None:
+                self.valores_[col] = valor
+        return self
+
+    def transform(self, X):
+        return X.assign(**{
+            col: compact_dtypes.preencher_categoria(X[col], valor)
+            for col, valor in self.valores_.items()
+            if col in X.columns
+        })
+
+
+class GroupImputer(BaseEstimator, TransformerMixin):
+    """
+    Preenche faltantes com a média/mediana do grupo (ex: tipo_renda × educacao).
+
+    As estatísticas por grupo são aprendidas no fit (equivalente a um groupby-transform
+    nos dados de treino); grupos sem valor ou novos na escoragem usam a estatística global.
+
+    Args:
+        colunas: Colunas numéricas a preencher
+        grupos: Colunas que definem os grupos
+        metodo: "Média" ou "Mediana"
+    """
+    def __init__(self, colunas=None, grupos=None, metodo="Mediana"):
+        self.colunas = colunas
+        self.grupos = grupos
+        self.metodo = metodo
+
+    def fit(self, X, y=None):
+        agregacao = "mean" if self.metodo == "Média" else "median"
+        self.colunas_ = list(self.colunas or [])
+        self.grupos_ = list(self.grupos or [])
+        self.por_grupo_ = X.groupby(self.grupos_, observed=True, sort=False)[self.colunas_].agg(agregacao)
+        self.global_ = X[self.colunas_].agg(agregacao)
+        return self
+
+    def transform(self, X):
+        colunas = [col for col in self.colunas_ if col in X.columns]
+        if not colunas:
+            return X
+        if len(self.grupos_) > 1:
+            chaves = pd.MultiIndex.from_frame(X[self.grupos_])
+        else:
+            chaves = pd.Index(X[self.grupos_[0]])
+        # Uma busca por hash para todas as linhas, em vez de um groupby por coluna
+        valores_grupo = self.por_grupo_[colunas].reindex(chaves)
+        return X.assign(**{
+            col: X[col]
+            .fillna(pd.Series(valores_grupo[col].to_numpy(), index=X.index))
+            .fillna(self.global_[col])
+            for col in colunas
+        })
+
+
+def _transformar_lote(imputador, valores):
+    return imputador.transform(valores)
+
+
+class ModelImputer(BaseEstimator, TransformerMixin):
+    """
+    Imputação por modelo (KNN ou iterativa) a partir de colunas preditoras escolhidas.
+
+    As colunas são padronizadas (média 0, desvio 1) antes do modelo, para que
+    nenhuma domine as distâncias do KNN. O fit usa uma amostra limitada de linhas;
+    o transform só processa as linhas com faltantes, em lotes distribuídos entre processos.
+
+    Args:
+        colunas: Colunas numéricas a preencher
+        preditoras: Colunas numéricas usadas só como preditoras (sem target e IDs)
+        metodo: "KNN" ou "Iterativo"
+        n_vizinhos: Vizinhos do KNN
+        amostra: Máximo de linhas usadas no fit
+        tamanho_lote: Linhas por lote no transform
+        n_jobs: Processos em paralelo no transform (-1 = todos os núcleos)
+    """
+    def __init__(self, colunas=None, preditoras=None, metodo="KNN", n_vizinhos=5, amostra=50_000,
+                 tamanho_lote=50_000, n_jobs=-1, random_state=0):
+        self.colunas = colunas
+        self.preditoras = preditoras
+        self.metodo = metodo
+        self.n_vizinhos = n_vizinhos
+        self.amostra = amostra
+        self.tamanho_lote = tamanho_lote
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _criar_imputador(self):
+        if self.metodo == "KNN":
+            return KNNImputer(n_neighbors=self.n_vizinhos, keep_empty_features=True)
+        from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+        from sklearn.impute import IterativeImputer
+        return IterativeImputer(random_state=self.random_state, keep_empty_features=True)
+
+    def fit(self, X, y=None):
+        self.colunas_ = [col for col in self.colunas or [] if col in X.columns]
+        # Conjunto explícito: colunas a preencher + preditoras escolhidas, sem repetição
+        self.features_ = list(dict.fromkeys(
+            self.colunas_ + [col for col in self.preditoras or [] if col in X.columns]
+        ))
+        dados = X[self.features_]
+        if len(dados) > self.amostra:
+            dados = dados.sample(self.amostra, random_state=self.random_state)
+        valores = dados.to_numpy(dtype="float64", na_value=np.nan)
+        with warnings.catch_warnings():
+            # Coluna toda vazia na amostra: média/desvio NaN, tratados abaixo
+            warnings.simplefilter("ignore", RuntimeWarning)
+            media = np.nanmean(valores, axis=0)
+            escala = np.nanstd(valores, axis=0)
+        self.media_ = np.nan_to_num(media, nan=0.0)
+        self.escala_ = np.where(np.isfinite(escala) & (escala > 0), escala, 1.0)
+        self.imputador_ = self._criar_imputador().fit((valores - self.media_) / self.escala_)
+        return self
+
+    def transform(self, X):
+        colunas = [col for col in self.colunas_ if col in X.columns]
+        if not colunas:
+            return X
+        ausentes = [col for col in self.features_ if col not in X.columns]
+        if ausentes:
+            # Preditoras ausentes (ex: na escoragem) entram como faltantes no modelo
+            warnings.warn(f"Colunas ausentes na imputação por modelo: {', '.join(ausentes)}")
+        valores = X.reindex(columns=self.features_).to_numpy(dtype="float64", na_value=np.nan)
+        # Transformadores gravados antes da padronização não têm media_/escala_
+        media = getattr(self, 'media_', np.zeros(len(self.features_)))
+        escala = getattr(self, 'escala_', np.ones(len(self.features_)))
+        posicoes = [self.features_.index(col) for col in colunas]
+        linhas = np.flatnonzero(np.isnan(valores[:, posicoes]).any(axis=1))
+        if not len(linhas):
+            return X
+
+        padronizados = (valores[linhas] - media) / escala
+        lotes = [padronizados[i:i + self.tamanho_lote] for i in range(0, len(linhas), self.tamanho_lote)]
+        if len(lotes) > 1 and self.n_jobs != 1:
+            preenchidos = Parallel(n_jobs=self.n_jobs)(
+                delayed(_transformar_lote)(self.imputador_, lote) for lote in lotes
+            )
+        else:
+            preenchidos = [self.imputador_.transform(lote) for lote in lotes]
+        preenchidos = np.vstack(preenchidos) * escala + media
+
+        novos = {}
+        for col, posicao in zip(colunas, posicoes):
+            coluna = valores[:, posicao].copy()
+            coluna[linhas] = preenchidos[:, posicao]
+            novos[col] = coluna
+        return X.assign(**novos)
+
+
+def converter_data(serie, formato=None):
+    """
+    Converte uma coluna para datetime64 com um formato explícito.
+
+    Colunas 'category' convertem só as categorias; as demais usam o cache de valores
+    repetidos do pandas.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = pd.DatetimeIndex(pd.to_datetime(serie.cat.categories, format=formato, errors='coerce'))
+        valores = categorias.take(serie.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT)
+        return pd.Series(valores, index=serie.index, name=serie.name)
+    return pd.to_datetime(serie, format=formato, errors='coerce', cache=True)
+
+
+class DateConverter(BaseEstimator, TransformerMixin):
+    """
+    Converte colunas para datetime64 (a formatação dd/mm/aaaa fica só na interface).
+
+    Args:
+        colunas: Colunas a converter
+        formatos: Dicionário {coluna: formato de leitura} (ver process_datetime.detectar_formatos_data)
+    """
+    def __init__(self, colunas=None, formatos=None):
+        self.colunas = colunas
+        self.formatos = formatos
+
+    def fit(self, X, y=None):
+        self.colunas_ = [col for col in (self.colunas or []) if col in X.columns]
+        return self
+
+    def transform(self, X):
+        formatos = getattr(self, 'formatos', None) or {}
+        return X.assign(**{
+            col: converter_data(X[col], formatos.get(col))
+            for col in self.colunas_
+            if col in X.columns
+        })
+
+
+# Atributos que o DateFeatures sabe extrair (colunas geradas: <coluna>_ano, _mes, _dia_semana, _dias)
+PARTES_DATA = ["Ano", "Mês", "Dia da semana", "Dias decorridos"]
+
+
+class DateFeatures(BaseEstimator, TransformerMixin):
+    """
+    Extrai ano, mês, dia da semana e dias decorridos de colunas datetime64.
+
+    Os dias decorridos são contados a partir da menor data vista no fit.
+
+    Args:
+        colunas: Colunas de data
+        partes: Chaves de PARTES_DATA a extrair
+    """
+    def __init__(self, colunas=None, partes=None):
+        self.colunas = colunas
+        self.partes = partes
+
+    def fit(self, X, y=None):
+        self.colunas_ = [col for col in (self.colunas or []) if col in X.columns]
+        self.partes_ = list(self.partes or PARTES_DATA)
+        self.referencia_ = {col: X[col].min() for col in self.colunas_}
+        return self
+
+    def transform(self, X):
+        novas = {}
+        for col in self.colunas_:
+            if col not in X.columns:
+                continue
+            datas = X[col].dt
+            if "Ano" in self.partes_:
+                novas[f"{col}_ano"] = datas.year.astype("Int16")
+            if "Mês" in self.partes_:
+                novas[f"{col}_mes"] = datas.month.astype("Int8")
+            if "Dia da semana" in self.partes_:
+                novas[f"{col}_dia_semana"] = datas.weekday.astype("Int8")
+            if "Dias decorridos" in self.partes_:
+                novas[f"{col}_dias"] = (X[col] - self.referencia_[col]).dt.days.astype("Int32")
+        return X.assign(**novas)
+
+
+class NumericScaler(BaseEstimator, TransformerMixin):
+    """
+    Normaliza colunas numéricas com parâmetros aprendidos no fit.
+
+    Args:
+        metodo: "MinMax (0-1)", "Padronização (Z-score)" ou "Logarítmica"
+        colunas: Colunas a normalizar
+
+    Raises:
+        ValueError: Na logarítmica, se alguma coluna de treino (fit) tiver valores <= 0.
+            No transform esses valores viram NaN com um aviso, sem derrubar o lote
+    """
+    def __init__(self, metodo="MinMax (0-1)", colunas=None):
+        self.metodo = metodo
+        self.colunas = colunas
+
+    @staticmethod
+    def _nao_positivos(X, colunas):
+        """Descrição das colunas com valores <= 0, onde o log não é definido (vazio se nenhuma)."""
+        invalidas = {col: int((X[col] <= 0).sum()) for col in colunas}
+        return ", ".join(f"{col} ({qtd} valores)" for col, qtd in invalidas.items() if qtd)
+
+    def fit(self, X, y=None):
+        colunas = list(self.colunas or [])
+        if self.metodo == "Logarítmica":
+            invalidas = self._nao_positivos(X, colunas)
+            if invalidas:
+                raise ValueError(f"Normalização logarítmica exige valores positivos: {invalidas} <= 0")
+        if self.metodo == "Logarítmica" or not colunas:
+            self.deslocamento_ = pd.Series(0.0, index=colunas)
+            self.escala_ = pd.Series(1.0, index=colunas)
+            return self
+
+        dados = X[colunas]
+        if self.metodo == "MinMax (0-1)":
+            self.deslocamento_ = dados.min()
+            escala = dados.max() - self.deslocamento_
+        else:
+            # Mesmo critério do StandardScaler (desvio padrão populacional)
+            self.deslocamento_ = dados.mean()
+            escala = dados.std(ddof=0)
+        # Em float64 para não estourar inteiros compactados (int8, int16...)
+        self.deslocamento_ = self.deslocamento_.astype('float64')
+        self.escala_ = escala.astype('float64').where(escala != 0, 1.0)
+        return self
+
+    def transform(self, X):
+        colunas = [col for col in self.escala_.index if col in X.columns]
+        if self.metodo == "Logarítmica":
+            invalidas = self._nao_positivos(X, colunas)
+            if invalidas:
+                # Na escoragem um valor inválido não derruba o lote: a linha fica com NaN
+                warnings.warn(f"Valores <= 0 na normalização logarítmica viraram NaN: {invalidas}")
+            return X.assign(**{col: np.log(X[col].where(X[col] > 0)) for col in colunas})
+        return X.assign(**{
+            col: (X[col] - self.deslocamento_[col]) / self.escala_[col]
+            for col in colunas
+        })
+
+
+class DummyEncoder(BaseEstimator, TransformerMixin):
+    """
+    One-hot encoding com as categorias aprendidas no fit.
+
+    Na escoragem as colunas geradas são sempre as mesmas do treino: categorias
+    novas ficam com todas as dummies zeradas.
+    """
+    def __init__(self, colunas=None, drop_first=True):
+        self.colunas = colunas
+        self.drop_first = drop_first
+
+    def fit(self, X, y=None):
+        self.categorias_ = {}
+        for col in self.colunas or []:
+            serie = X[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                categorias = serie.cat.remove_unused_categories().cat.categories
+            else:
+                categorias = pd.Index(serie.dropna().unique()).sort_values()
+            self.categorias_[col] = list(categorias)
+        return self
+
+    def transform(self, X):
+        colunas = [col for col in self.categorias_ if col in X.columns]
+        X = X.assign(**{
+            col: pd.Categorical(X[col], categories=self.categorias_[col])
+            for col in colunas
+        })
+        return pd.get_dummies(X, columns=colunas, drop_first=self.drop_first)
+
+
+def transformar(df, transformador):
+    """Aplica um transformador já ajustado (usado como etapa do dataset versionado)."""
+    return transformador.transform(df)
+
+
+def _nome_passo(indice, nome):
+    return f"{indice:02d}_" + re.sub(r'\W+', '_', nome.lower()).strip('_')
+
+
+def montar_pipeline(etapas):
+    """
+    Monta um Pipeline do scikit-learn com os transformadores ajustados das etapas.
+
+    Etapas que apenas removem linhas (faltantes, duplicatas, outliers) valem só para
+    o treino e não entram no pipeline de escoragem.
+
+    Returns:
+        Pipeline ou None se nenhuma etapa gerou transformador
+    """
+    passos = [
+        (_nome_passo(i, etapa.nome), etapa.params['transformador'])
+        for i, etapa in enumerate(etapas)
+        if 'transformador' in etapa.params
+    ]
+    return Pipeline(passos) if passos else None
+
+
+def salvar_pipeline(pipeline, caminho=PIPELINE_PATH):
+    """Grava o pipeline ajustado para ser usado na escoragem."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipeline, caminho)
+    return caminho
+
+
+def carregar_pipeline(caminho=PIPELINE_PATH):
+    """Carrega o pipeline gravado ou retorna None se ele não existir."""
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return None
+    return joblib.load(caminho)
+
+
+def aplicar_em_lotes(pipeline, df, tamanho_lote=None):
+    """
+    Aplica o pipeline ao DataFrame, opcionalmente em lotes de linhas.
+
+    Todas as transformações são vetorizadas; os lotes só limitam o pico de memória.
+    """
+    if tamanho_lote is None or len(df) <= tamanho_lote:
+        return pipeline.transform(df)
+    return pd.concat(
+        [pipeline.transform(df.iloc[i:i + tamanho_lote]) for i in range(0, len(df), tamanho_lote)]
+    )
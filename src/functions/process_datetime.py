@@ -1,30 +1,140 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-def get_date_columns(df, sample_size=500, threshold=0.7):
-    date_cols = []
-    
-    sample_df = df.sample(min(sample_size, len(df))) if len(df) > sample_size else df
-    
-    for col in sample_df.columns:
-        if pd.api.types.is_numeric_dtype(sample_df[col]) and not any(name in col.lower() for name in ['date', 'time', 'year']):
+from functions import preprocessing_pipeline, versioned_dataset
+
+# Formatos testados na detecção e a expressão regular que os identifica.
+# Em caso de empate vale a ordem abaixo (dd/mm antes de mm/dd)
+FORMATOS_DATA = {
+    '%d/%m/%Y': r'\d{1,2}/\d{1,2}/\d{4}',
+    '%m/%d/%Y': r'\d{1,2}/\d{1,2}/\d{4}',
+    '%d/%m/%Y %H:%M': r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}',
+    '%d/%m/%Y %H:%M:%S': r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2}',
+    '%Y-%m-%d': r'\d{4}-\d{1,2}-\d{1,2}',
+    '%Y-%m-%d %H:%M:%S': r'\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{2}:\d{2}',
+    '%Y-%m-%dT%H:%M:%S': r'\d{4}-\d{1,2}-\d{1,2}T\d{1,2}:\d{2}:\d{2}',
+    '%Y/%m/%d': r'\d{4}/\d{1,2}/\d{1,2}',
+    '%d-%m-%Y': r'\d{1,2}-\d{1,2}-\d{4}',
+    '%d.%m.%Y': r'\d{1,2}\.\d{1,2}\.\d{4}',
+    '%Y%m%d': r'\d{8}',
+    '%m/%Y': r'\d{1,2}/\d{4}',
+}
+
+# Colunas numéricas só são testadas quando o nome sugere uma data
+NOMES_DATA = ['date', 'time', 'year', 'data']
+
+def amostra_fixa(serie, sample_size=200):
+    """Amostra determinística: valores não nulos em posições igualmente espaçadas da coluna."""
+    if len(serie) > sample_size * 2:
+        posicoes = np.linspace(0, len(serie) - 1, sample_size * 2).astype(np.intp)
+        serie = serie.iloc[posicoes]
+    return serie.dropna().head(sample_size)
+
+def inferir_formato(amostra, threshold=0.7):
+    """
+    Descobre o formato de data de uma amostra de textos.
+
+    Os formatos passam primeiro pelo filtro de regex; só os aprovados são
+    convertidos com o formato explícito, e vence o de maior taxa de sucesso.
+
+    Returns:
+        str ou None se nenhum formato atingir o limiar
+    """
+    if not len(amostra):
+        return None
+    textos = amostra.astype(str).str.strip()
+
+    melhor, melhor_taxa = None, threshold
+    for formato, padrao in FORMATOS_DATA.items():
+        if textos.str.fullmatch(padrao).mean() < threshold:
             continue
-            
-        try:
-            converted = pd.to_datetime(sample_df[col], errors='coerce', infer_datetime_format=True)
-            success_rate = converted.notna().mean()
-            
-            if success_rate >= threshold:
-                date_cols.append(col)
-        except (TypeError, ValueError):
+        taxa = pd.to_datetime(textos, format=formato, errors='coerce').notna().mean()
+        if taxa > melhor_taxa or (melhor is None and taxa >= threshold):
+            melhor, melhor_taxa = formato, taxa
+    return melhor
+
+def detectar_formatos_data(df, sample_size=200, threshold=0.7):
+    """
+    Detecta as colunas de data e o formato de cada uma.
+
+    Returns:
+        Dict {coluna: formato}; colunas que já são datetime64 têm formato None
+    """
+    formatos = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            formatos[col] = None
             continue
-    
-    return date_cols
+        if pd.api.types.is_bool_dtype(serie):
+            continue
+
+        amostra = amostra_fixa(serie, sample_size)
+        if pd.api.types.is_numeric_dtype(serie):
+            if not any(nome in str(col).lower() for nome in NOMES_DATA):
+                continue
+            # Datas numéricas (ex: 20240131) só fazem sentido como inteiros
+            amostra = amostra[amostra == amostra.round()].astype('int64')
+
+        formato = inferir_formato(amostra, threshold)
+        if formato is not None:
+            formatos[col] = formato
+    return formatos
+
+def taxa_falhas_amostra(serie, formato, sample_size=200):
+    """
+    Fração estimada, na amostra da detecção, dos valores que não convertem (viram NaT).
+
+    A detecção aceita colunas em que só `threshold` da amostra converte; a coluna
+    inteira só é convertida uma vez, ao aplicar a etapa.
+    """
+    amostra = amostra_fixa(serie, sample_size)
+    if not len(amostra):
+        return 0.0
+    return float(preprocessing_pipeline.converter_data(amostra, formato).isna().mean())
+
+def contar_novos_faltantes(antes, depois, colunas):
+    """Valores preenchidos em `antes` que ficaram vazios em `depois` (sem novo parsing)."""
+    return {col: int((depois[col].isna() & antes[col].notna()).sum()) for col in colunas}
+
+def get_date_columns(df, sample_size=200, threshold=0.7):
+    """Colunas identificadas como data (ver detectar_formatos_data)."""
+    return list(detectar_formatos_data(df, sample_size, threshold))
+
+def formato_datas(df):
+    """Formatação dd/mm/aaaa das colunas datetime64, aplicada apenas na exibição."""
+    return {
+        col: st.column_config.DateColumn(format="DD/MM/YYYY")
+        for col in df.columns
+        if pd.api.types.is_datetime64_any_dtype(df[col])
+    }
+
+def extrair_atributos_data(colunas_datetime):
+    """Interface para gerar ano, mês, dia da semana e dias decorridos das colunas de data."""
+    st.markdown("---")
+    st.markdown("**Extrair atributos de data**")
+    colunas = st.multiselect("Colunas de data:", colunas_datetime, key="atributos_data_colunas")
+    partes = st.multiselect(
+        "Atributos:",
+        preprocessing_pipeline.PARTES_DATA,
+        default=preprocessing_pipeline.PARTES_DATA,
+        key="atributos_data_partes"
+    )
+    if st.button("Extrair atributos", disabled=not (colunas and partes)):
+        versioned_dataset.registrar_transformador(
+            f"Extrair atributos de {', '.join(colunas)}",
+            preprocessing_pipeline.DateFeatures(colunas=colunas, partes=partes)
+        )
+        st.rerun()
 
 def datetime_options(df):
     """Interface para seleção e processamento de colunas de data."""
     with st.expander("🔍 ** Formatar data **", expanded=True):
-        date_columns = get_date_columns(df)
+        # Detecção determinística, calculada uma única vez por versão do dataset
+        dataset = versioned_dataset.dataset_atual()
+        formatos = dataset.memo("formatos_data", detectar_formatos_data)
+        date_columns = list(formatos)
         
         if not date_columns:
             st.info("Nenhuma coluna com formato de data identificada.")
@@ -33,21 +143,51 @@ def datetime_options(df):
         selected_dates = st.multiselect(
             "Selecione colunas para converter para datetime:",
             options=date_columns,
-            default=[date_columns[0]]
+            default=[date_columns[0]],
+            format_func=lambda col: f"{col} ({formatos[col] or 'datetime'})"
         )
         
+        taxas = dataset.memo(
+            "falhas_datas",
+            lambda d: {col: taxa_falhas_amostra(d[col], formatos[col]) for col in date_columns}
+        )
+        for col in selected_dates:
+            if taxas.get(col):
+                st.warning(
+                    f"⚠️ {col}: cerca de {taxas[col]:.0%} dos valores não convertem com o formato "
+                    f"{formatos[col]} e ficarão vazios (NaT)"
+                )
+
         if st.button("Converter colunas selecionadas"):
             if selected_dates:
-                for col in selected_dates:
-                    df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%d/%m/%Y')
-                    st.session_state.df = df
-                st.success(f"Colunas convertidas para datetime (dd/mm/aaaa): {selected_dates}")
+                versioned_dataset.registrar_transformador(
+                    "Converter datas",
+                    preprocessing_pipeline.DateConverter(
+                        colunas=selected_dates,
+                        formatos={col: formatos[col] for col in selected_dates}
+                    )
+                )
+                st.success(f"Colunas convertidas para datetime: {selected_dates}")
+                # Contagem exata comparando as duas versões, sem converter de novo
+                falhas = contar_novos_faltantes(df, st.session_state.df, selected_dates)
+                falhas_selecionadas = {col: qtd for col, qtd in falhas.items() if qtd}
+                if falhas_selecionadas:
+                    # Os NaT gerados fazem o assistente voltar à etapa de dados faltantes
+                    st.session_state.aviso_datas = (
+                        "Datas que não converteram viraram valores faltantes: "
+                        + ", ".join(f"{col} ({qtd})" for col, qtd in falhas_selecionadas.items())
+                        + ". Trate-as antes de continuar."
+                    )
                 st.rerun()
             else:
                 st.warning("Nenhuma coluna selecionada para conversão.")
                 
+        colunas_datetime = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+        if colunas_datetime:
+            extrair_atributos_data(colunas_datetime)
+
         if st.session_state.df is not None:
-            st.dataframe(df.head(5))
+            st.dataframe(df.head(5), column_config=formato_datas(df))
             
         if st.button("Próxima etapa"):
             st.session_state.datetime = True
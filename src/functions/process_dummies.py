@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
-from sklearn.base import BaseEstimator, TransformerMixin
+
+from functions import preprocessing_pipeline, versioned_dataset
 
 def criar_dummies_dataframe(df):
     """
@@ -8,8 +8,6 @@ def criar_dummies_dataframe(df):
     Mostra os 5 primeiros registros após gravar/desfazer.
     """
     # Inicializa estados da sessão
-    if 'df_original_dummies' not in st.session_state:
-        st.session_state.df_original_dummies = df.copy()
     if 'show_preview' not in st.session_state:
         st.session_state.show_preview = False
     
@@ -23,7 +21,7 @@ def criar_dummies_dataframe(df):
     # Selecionar colunas categóricas
     colunas_categoricas = df.select_dtypes(include=['object', 'category']).columns.tolist()
     
-    if not colunas_categoricas:
+    if not colunas_categoricas and not st.session_state.show_preview:
         st.session_state.dummies = True
         return df
     
@@ -40,23 +38,18 @@ def criar_dummies_dataframe(df):
     # Aplicar transformação
     if st.button("Criar Variáveis Dummy"):
         try:
-            df_dummies = df.copy()
-            
             # Verificar cardinalidade
             high_card = [col for col in colunas_selecionadas if df[col].nunique() > 15]
             if high_card:
                 st.warning(f"Cuidado com alta cardinalidade em: {', '.join(high_card)}")
             
             # Criar dummies
-            df_dummies = pd.get_dummies(
-                df_dummies,
-                columns=colunas_selecionadas,
-                drop_first=drop_first
+            versioned_dataset.registrar_transformador(
+                "Variáveis dummy",
+                preprocessing_pipeline.DummyEncoder(colunas=colunas_selecionadas, drop_first=drop_first)
             )
             
-            st.session_state.df_temp = df_dummies.copy()
             st.session_state.show_preview = True
-            st.session_state.df = st.session_state.df_temp.copy()
             st.success("Transformação aplicada! Visualize o resultado abaixo.")
             
         except Exception as e:
@@ -65,17 +58,18 @@ def criar_dummies_dataframe(df):
     # Mostrar prévia após transformação
     if st.session_state.show_preview:
         st.subheader("Prévia dos dados (5 primeiros registros)")
-        st.dataframe(st.session_state.df_temp.head())
+        st.dataframe(st.session_state.df.head())
         
         col1, col2 = st.columns(2)
         with col1:
             if st.button("⏪ Desfazer"):
-                st.session_state.df = st.session_state.df_original_dummies.copy()
-                st.session_state.df_temp = st.session_state.df_original_dummies.copy()
+                versioned_dataset.desfazer_etapa()
+                st.session_state.show_preview = False
                 st.rerun()
         
         with col2:
             if st.button("💾 Gravar Alterações"):
+                st.session_state.show_preview = False
                 st.session_state.dummies = True
                 st.rerun()
     
@@ -1,42 +1,232 @@
+import time
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 
+from functions import versioned_dataset
+
+
+def hash_linhas(df):
+    """Impressão digital de 64 bits de cada linha (um único array uint64)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def normalizar_para_comparacao(df, casas_decimais=2):
+    """
+    Versão normalizada das colunas para a busca de quase duplicatas.
+
+    Textos ficam sem acentos, em minúsculas e sem espaços extras; números são
+    arredondados. A normalização de texto é feita só nos valores distintos.
+    """
+    saida = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            saida[col] = serie
+        elif pd.api.types.is_numeric_dtype(serie):
+            saida[col] = serie.round(casas_decimais)
+        else:
+            codigos, valores = pd.factorize(serie)
+            normalizados = (
+                pd.Index(valores).astype(str)
+                .str.normalize('NFKD')
+                .str.encode('ascii', 'ignore')
+                .str.decode('ascii')
+                .str.lower()
+                .str.strip()
+                .str.replace(r'\s+', ' ', regex=True)
+            )
+            # Faltantes (código -1) continuam faltantes, sem herdar o último valor distinto
+            saida[col] = pd.Series(normalizados.take(codigos, allow_fill=True, fill_value=np.nan), index=df.index)
+    return pd.DataFrame(saida, index=df.index)
+
+
+def hash_chave(df, subset=None, normalizar=False, casas_decimais=2):
+    """Hash de cada linha considerando só as colunas `subset`, opcionalmente normalizadas."""
+    dados = df if subset is None else df[list(subset)]
+    if normalizar:
+        dados = normalizar_para_comparacao(dados, casas_decimais)
+    return hash_linhas(dados)
+
+
+def analisar_duplicatas(df, subset=None, normalizar=False, casas_decimais=2):
+    """
+    Agrupa as linhas iguais a partir dos hashes, em uma única passada.
+
+    Com `subset`, só as colunas indicadas são comparadas (duplicatas por chave); com
+    `normalizar`, textos e números são normalizados antes do hash (quase duplicatas).
+    Os grupos saem do hash, sem comparar as linhas par a par.
+
+    Returns:
+        Dict com 'codigos' (grupo de cada linha), 'contagens' (linhas por grupo),
+        'primeiras' (posição da primeira linha de cada grupo), 'n_duplicados' e 'n_grupos'
+    """
+    codigos, grupos = pd.factorize(hash_chave(df, subset, normalizar, casas_decimais))
+    contagens = np.bincount(codigos, minlength=len(grupos))
+    # Os códigos surgem em ordem crescente: a linha é a primeira do grupo quando
+    # seu código é maior que todos os anteriores
+    maximo_anterior = np.maximum.accumulate(np.r_[-1, codigos[:-1]])
+    primeiras = np.flatnonzero(codigos > maximo_anterior)
+    return {
+        'codigos': codigos,
+        'contagens': contagens,
+        'primeiras': primeiras,
+        'n_duplicados': int(len(codigos) - len(grupos)),
+        'n_grupos': int((contagens > 1).sum()),
+    }
+
+
+def analise_da_versao(dataset=None):
+    """Análise de duplicatas calculada uma única vez por versão do dataset."""
+    dataset = dataset or versioned_dataset.dataset_atual()
+    return dataset.memo("duplicatas", analisar_duplicatas)
+
+
+def remover_duplicatas(df, keep='first', subset=None, normalizar=False, casas_decimais=2):
+    """Remove as linhas duplicadas mantendo a ocorrência indicada em `keep`."""
+    hashes = hash_chave(df, subset, normalizar, casas_decimais)
+    duplicadas = pd.Series(hashes).duplicated(keep=keep).to_numpy()
+    return df[~duplicadas]
+
+
+def estatisticas_duplicatas(df, analise):
+    """Uma linha por grupo duplicado, com a quantidade de ocorrências (maiores primeiro)."""
+    contagens = analise['contagens']
+    grupos = np.flatnonzero(contagens > 1)
+    grupos = grupos[np.argsort(-contagens[grupos], kind='stable')]
+    return df.iloc[analise['primeiras'][grupos]].assign(Contagem=contagens[grupos])
+
+
+OPCOES_KEEP = {
+    "Remover todas as linhas duplicadas (manter apenas a primeira ocorrência)": 'first',
+    "Remover todas as linhas duplicadas (manter apenas a última ocorrência)": 'last',
+    "Manter apenas linhas que NÃO são duplicatas (remover TODAS as ocorrências de duplicatas)": False,
+}
+
+# Chave usada por padrão na busca por chave, quando existir no dataset
+CHAVE_PADRAO = ['id_cliente', 'data_ref']
+
+
+def duplicatas_por_chave(df):
+    """Busca de duplicatas por colunas-chave, exatas ou aproximadas (quase duplicatas)."""
+    with st.expander("🔑 **Duplicatas por chave e quase duplicatas**", expanded=False):
+        colunas = df.columns.tolist()
+        chaves = st.multiselect(
+            "Colunas-chave:",
+            options=colunas,
+            default=[col for col in CHAVE_PADRAO if col in colunas],
+            key="duplicatas_chaves"
+        )
+        modo = st.radio(
+            "Modo:",
+            ["Chave exata", "Quase duplicatas"],
+            horizontal=True,
+            key="duplicatas_modo",
+            help="Quase duplicatas: mesma chave e demais campos iguais após normalizar textos e arredondar números"
+        )
+
+        normalizar = modo == "Quase duplicatas"
+        comparar, casas_decimais = [], 2
+        if normalizar:
+            comparar = st.multiselect(
+                "Campos comparados dentro de cada chave:",
+                options=[col for col in colunas if col not in chaves],
+                default=[col for col in colunas if col not in chaves],
+                key="duplicatas_comparar"
+            )
+            casas_decimais = st.number_input(
+                "Casas decimais para arredondar números:", min_value=0, max_value=10, value=2,
+                key="duplicatas_casas"
+            )
+
+        if not chaves:
+            st.info("Selecione ao menos uma coluna-chave.")
+            return
+
+        params = {
+            'subset': chaves + comparar,
+            'normalizar': normalizar,
+            'casas_decimais': int(casas_decimais),
+        }
+        dataset = versioned_dataset.dataset_atual()
+        resultado = st.session_state.get("duplicatas_chave")
+        if resultado is not None and (resultado['versao'], resultado['params']) != (dataset.versao, params):
+            resultado = None
+
+        if st.button("🔎 Procurar duplicatas"):
+            inicio = time.perf_counter()
+            analise_chaves = analisar_duplicatas(df, subset=chaves)
+            analise = analisar_duplicatas(df, **params)
+            resultado = {
+                'versao': dataset.versao,
+                'params': params,
+                'analise': analise,
+                'chaves_repetidas': analise_chaves['n_grupos'],
+                'segundos': time.perf_counter() - inicio,
+            }
+            st.session_state.duplicatas_chave = resultado
+
+        if resultado is None:
+            return
+
+        analise = resultado['analise']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Chaves repetidas", resultado['chaves_repetidas'])
+        col2.metric("Grupos encontrados", analise['n_grupos'])
+        col3.metric("Linhas removíveis", analise['n_duplicados'])
+        col4.metric("Tempo", f"{resultado['segundos']:.2f}s")
+
+        if not analise['n_duplicados']:
+            st.success("Nenhuma duplicata encontrada com esses critérios.")
+            return
+
+        st.dataframe(estatisticas_duplicatas(df, analise))
+        option = st.radio("Como deseja tratar essas duplicatas?", options=list(OPCOES_KEEP), key="duplicatas_chave_keep")
+        if st.button("Aplicar Tratamento por Chave"):
+            versioned_dataset.registrar_etapa(
+                f"Remover {'quase duplicatas' if normalizar else 'duplicatas'} por {', '.join(chaves)}",
+                remover_duplicatas,
+                keep=OPCOES_KEEP[option],
+                **params
+            )
+            st.session_state.duplicatas_chave = None
+            st.rerun()
+
 
 def check_duplicates(df):
     """
     Verifica e exibe informações sobre linhas duplicadas no DataFrame
     Retorna o DataFrame sem duplicatas se o usuário optar por removê-las
     """
-    total_duplicados = df.duplicated().sum()
-    
+    analise = analise_da_versao()
+    total_duplicados = analise['n_duplicados']
+
     if total_duplicados > 0:
         with st.expander("🔍 **Verificação de Dados Duplicados**", expanded=True):
             st.warning(f"⚠️ **{total_duplicados} linhas duplicadas** encontradas no dataset")
-            
+
             # Opções para o usuário
             option = st.radio(
                 "Como deseja tratar os dados duplicados?",
-                options=[
-                    "Remover todas as linhas duplicadas (manter apenas a primeira ocorrência)",
-                    "Remover todas as linhas duplicadas (manter apenas a última ocorrência)",
-                    "Manter apenas linhas que NÃO são duplicatas (remover TODAS as ocorrências de duplicatas)"
-                ],
+                options=list(OPCOES_KEEP),
                 index=0
             )
-            
+
             if st.button("Aplicar Tratamento de Duplicatas"):
-                if option == "Remover todas as linhas duplicadas (manter apenas a primeira ocorrência)":
-                    df = df.drop_duplicates(keep='first')
-                elif option == "Remover todas as linhas duplicadas (manter apenas a última ocorrência)":
-                    df = df.drop_duplicates(keep='last')
-                elif option == "Manter apenas linhas que NÃO são duplicatas (remover TODAS as ocorrências de duplicatas)":
-                    df = df.drop_duplicates(keep=False)
-                
-                st.success(f"✅ {total_duplicados - df.duplicated().sum()} linhas duplicadas removidas")
-                st.session_state.df = df
+                versioned_dataset.registrar_etapa("Remover duplicatas", remover_duplicatas, keep=OPCOES_KEEP[option])
                 st.rerun()
 
             # Mostrar estatísticas dos duplicados
-            dup_stats = df[df.duplicated(keep=False)].groupby(df.columns.tolist()).size().reset_index(name='Contagem')
-            st.dataframe(dup_stats.sort_values('Contagem', ascending=False))
-    
+            st.dataframe(estatisticas_duplicatas(df, analise))
+    else:
+        st.success("✅ Nenhuma linha duplicada por completo.")
+
+    duplicatas_por_chave(df)
+
+    # Botão para finalizar
+    if st.button("✅ Finalizar análise de duplicatas"):
+        st.session_state.duplicates_check = True
+        st.rerun()
+
     return df
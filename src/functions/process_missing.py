@@ -1,6 +1,12 @@
 import pandas as pd
 import streamlit as st
 
+from functions import preprocessing_pipeline, versioned_dataset
+
+def remover_faltantes(df):
+    """Remove as linhas com algum valor faltante."""
+    return df.dropna()
+
 def get_missing_data_stats(df):
     total_linhas = len(df)
     dados_faltantes = df.isna().sum()
@@ -14,47 +20,191 @@ def get_missing_data_stats(df):
     
     return faltantes_df[faltantes_df["Qtd. Faltantes"] > 0]
 
+ESTRATEGIAS = ["Manter", "Zero", "Média", "Mediana", "Moda", "Valor Personalizado"]
+
+def _numerica(serie):
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+def get_imputation_stats(df, colunas):
+    """
+    Média, mediana e moda das colunas com faltantes, calculadas uma única vez.
+
+    Média e mediana de todas as colunas numéricas saem de uma única agregação.
+    """
+    numericas = [col for col in colunas if _numerica(df[col])]
+    estatisticas = pd.DataFrame(index=pd.Index(colunas, name="Coluna"), columns=["Média", "Mediana"], dtype="float64")
+    if numericas:
+        estatisticas.loc[numericas, ["Média", "Mediana"]] = df[numericas].agg(["mean", "median"]).T.values
+
+    modas = {}
+    for col in colunas:
+        contagens = df[col].value_counts()
+        modas[col] = str(contagens.index[0]) if len(contagens) else None
+    estatisticas["Moda"] = pd.Series(modas)
+    estatisticas["Tipo"] = ["numérica" if col in numericas else "categórica" for col in colunas]
+    return estatisticas
+
+def _valor_personalizado(serie, valor):
+    """
+    Converte o valor digitado para número quando a coluna é numérica.
+
+    Returns:
+        O valor convertido ou None se a coluna é numérica e o valor não é um número
+    """
+    if _numerica(serie):
+        try:
+            return float(valor)
+        except ValueError:
+            return None
+    return valor
+
+def montar_plano_preenchimento(df, plano):
+    """
+    Converte a tabela editada em estratégias e valores para o MissingImputer.
+
+    Returns:
+        Tuple: (estrategias, valores, avisos)
+    """
+    estrategias, valores, avisos = {}, {}, []
+    for linha in plano.itertuples(index=False):
+        col, metodo, valor = linha.Coluna, linha.Estratégia, linha.Valor
+        if metodo == "Manter" or pd.isna(metodo):
+            continue
+        if metodo in ("Média", "Mediana") and not _numerica(df[col]):
+            avisos.append(f"{col}: {metodo} só se aplica a colunas numéricas")
+            continue
+        if metodo == "Valor Personalizado":
+            if pd.isna(valor) or valor == "":
+                avisos.append(f"{col}: informe o valor personalizado")
+                continue
+            convertido = _valor_personalizado(df[col], valor)
+            if convertido is None:
+                # Texto em coluna numérica a transformaria em object
+                avisos.append(f"{col}: o valor personalizado deve ser numérico")
+                continue
+            valores[col] = convertido
+        estrategias[col] = metodo
+    return estrategias, valores, avisos
+
+# Grupos sugeridos para a imputação por grupo, quando existirem no dataset
+GRUPOS_PADRAO = ["tipo_renda", "educacao"]
+
+# Identificadores nunca entram como preditoras na imputação por modelo
+COLUNAS_ID = ["id_cliente"]
+
+def preditoras_disponiveis(df, colunas):
+    """Colunas numéricas que podem ser preditoras: sem as preenchidas, IDs e o target."""
+    excluir = set(colunas) | set(COLUNAS_ID) | {st.session_state.get("target")}
+    return [col for col in df.columns if _numerica(df[col]) and col not in excluir]
+
+def imputacao_avancada(df, faltantes_df):
+    """Imputação por grupo (groupby) ou por modelo (KNN / iterativa) das colunas numéricas."""
+    colunas_faltantes = [col for col in faltantes_df["Coluna"] if _numerica(df[col])]
+    if not colunas_faltantes:
+        return
+
+    st.markdown("---")
+    st.markdown("**Imputação por grupo ou por modelo** (colunas numéricas)")
+
+    colunas = st.multiselect("Colunas a preencher:", colunas_faltantes, key="imputacao_colunas")
+    tipo = st.radio("Estratégia:", ["Por grupo", "KNN", "Iterativo"], horizontal=True, key="imputacao_tipo")
+
+    if tipo == "Por grupo":
+        categoricas = [col for col in df.columns if not _numerica(df[col])]
+        grupos = st.multiselect(
+            "Agrupar por:",
+            categoricas,
+            default=[col for col in GRUPOS_PADRAO if col in categoricas],
+            key="imputacao_grupos"
+        )
+        metodo = st.radio("Estatística do grupo:", ["Mediana", "Média"], horizontal=True, key="imputacao_metodo")
+        pronto = bool(colunas and grupos)
+        if colunas and not grupos:
+            st.info("Selecione ao menos uma coluna de agrupamento.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            amostra = st.number_input(
+                "Linhas usadas no ajuste (amostra):", min_value=1_000, value=50_000, step=10_000,
+                key="imputacao_amostra"
+            )
+        with col2:
+            n_vizinhos = st.number_input(
+                "Vizinhos (KNN):", min_value=1, max_value=50, value=5,
+                key="imputacao_vizinhos", disabled=tipo != "KNN"
+            )
+        opcoes = preditoras_disponiveis(df, colunas)
+        preditoras = st.multiselect(
+            "Colunas preditoras:",
+            opcoes,
+            default=opcoes,
+            key="imputacao_preditoras",
+            help="Usadas para estimar os faltantes; deixe de fora o target e identificadores"
+        )
+        pronto = bool(colunas)
+
+    if st.button("Aplicar Imputação", key="botao_imputacao", disabled=not pronto):
+        if tipo == "Por grupo":
+            nome = f"Preencher {', '.join(colunas)} por grupo ({' × '.join(grupos)}, {metodo})"
+            transformador = preprocessing_pipeline.GroupImputer(colunas=colunas, grupos=grupos, metodo=metodo)
+        else:
+            nome = f"Preencher {', '.join(colunas)} ({tipo})"
+            transformador = preprocessing_pipeline.ModelImputer(
+                colunas=colunas, preditoras=preditoras, metodo=tipo,
+                n_vizinhos=int(n_vizinhos), amostra=int(amostra)
+            )
+        with st.spinner("Aplicando imputação..."):
+            versioned_dataset.registrar_transformador(nome, transformador)
+        st.rerun()
+
 def handle_missing_values(df, faltantes_df):
     with st.expander("❗ **Tratamento de variável missing**", expanded=True):
         st.warning(f"⚠️ **{len(faltantes_df)} colunas com dados faltantes**")
-        st.dataframe(faltantes_df)
+        aviso_datas = st.session_state.pop("aviso_datas", None)
+        if aviso_datas:
+            st.info(f"📅 {aviso_datas}")
 
         if st.checkbox("Remover linhas com dados faltantes", key="remove_missing"):
-            df = df.dropna()
-            st.session_state.df = df
+            versioned_dataset.registrar_etapa("Remover linhas com faltantes", remover_faltantes)
             st.rerun()
 
-        coluna_preencher = st.selectbox(
-            "Coluna para preencher missing:",
-            faltantes_df["Coluna"].tolist(),
-            key="coluna_preencher"
-        )
+        dataset = versioned_dataset.dataset_atual()
+        colunas = faltantes_df["Coluna"].tolist()
+        estatisticas = dataset.memo("estatisticas_faltantes", lambda d: get_imputation_stats(d, colunas))
+
+        tabela = faltantes_df.set_index("Coluna").join(estatisticas).reset_index()
+        tabela["Estratégia"] = "Manter"
+        tabela["Valor"] = ""
 
-        metodo = st.radio(
-            "Método de preenchimento:",
-            ["Zero", "Média", "Mediana", "Moda", "Valor Personalizado"],
-            key="metodo_preenchimento"
+        st.markdown("**Plano de preenchimento** (escolha a estratégia de cada coluna)")
+        plano = st.data_editor(
+            tabela[["Coluna", "Tipo", "Qtd. Faltantes", "% Faltantes", "Média", "Mediana", "Moda", "Estratégia", "Valor"]],
+            column_config={
+                "Estratégia": st.column_config.SelectboxColumn("Estratégia", options=ESTRATEGIAS, required=True),
+                "Valor": st.column_config.TextColumn("Valor", help="Usado pela estratégia Valor Personalizado"),
+                "Média": st.column_config.NumberColumn("Média", format="%.4g"),
+                "Mediana": st.column_config.NumberColumn("Mediana", format="%.4g"),
+            },
+            disabled=["Coluna", "Tipo", "Qtd. Faltantes", "% Faltantes", "Média", "Mediana", "Moda"],
+            hide_index=True,
+            use_container_width=True,
+            key=f"plano_faltantes_{dataset.versao}"
         )
 
-        valor_personalizado = None
-        if metodo == "Valor Personalizado":
-            valor_personalizado = st.text_input("Digite o valor personalizado", key="valor_custom")
-
-        aplicar = st.button("Aplicar Preenchimento", key="botao_aplicar")
-
-        if aplicar:
-            if metodo == "Zero":
-                df[coluna_preencher] = df[coluna_preencher].fillna(0)
-            elif metodo == "Média":
-                df[coluna_preencher] = df[coluna_preencher].fillna(df[coluna_preencher].mean())
-            elif metodo == "Mediana":
-                df[coluna_preencher] = df[coluna_preencher].fillna(df[coluna_preencher].median())
-            elif metodo == "Moda":
-                df[coluna_preencher] = df[coluna_preencher].fillna(df[coluna_preencher].mode()[0])
-            elif metodo == "Valor Personalizado" and valor_personalizado:
-                df[coluna_preencher] = df[coluna_preencher].fillna(valor_personalizado)
-
-            st.session_state.df = df
-            st.rerun()
+        if st.button("Aplicar Plano de Preenchimento", key="botao_aplicar"):
+            estrategias, valores, avisos = montar_plano_preenchimento(df, plano)
+            for aviso in avisos:
+                st.warning(f"⚠️ {aviso}")
+            if estrategias and not avisos:
+                # Todas as colunas em uma única etapa (um fit e um transform)
+                versioned_dataset.registrar_transformador(
+                    f"Preencher faltantes de {len(estrategias)} colunas",
+                    preprocessing_pipeline.MissingImputer(estrategias=estrategias, valores=valores)
+                )
+                st.rerun()
+            elif not estrategias and not avisos:
+                st.info("Nenhuma estratégia escolhida.")
+
+        imputacao_avancada(df, faltantes_df)
     
     return df
\ No newline at end of file
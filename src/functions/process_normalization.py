@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from functions import preprocessing_pipeline, versioned_dataset
+
+METODOS = ["MinMax (0-1)", "Padronização (Z-score)", "Logarítmica"]
 
 def normalizar_dataframe(df):
     """
@@ -32,18 +35,14 @@ def normalizar_dataframe(df):
     # Selecionar tipo de normalização
     metodo = st.radio(
         "Selecione o método de normalização:",
-        options=[
-            "MinMax (0-1)",
-            "Padronização (Z-score)",
-            "Logarítmica",
-            "Personalizar colunas"
-        ]
+        options=METODOS + ["Personalizar colunas"]
     )
     
     # Selecionar colunas para normalizar
     colunas_numericas = df.select_dtypes(include=['number']).columns.tolist()
     
     if metodo == "Personalizar colunas":
+        metodo = st.radio("Método para as colunas escolhidas:", options=METODOS, horizontal=True)
         colunas_selecionadas = st.multiselect(
             "Selecione as colunas para normalizar:",
             options=colunas_numericas,
@@ -51,51 +50,49 @@ def normalizar_dataframe(df):
         )
     else:
         colunas_selecionadas = colunas_numericas
+
+    if 'normalizacao_preview' not in st.session_state:
+        st.session_state.normalizacao_preview = False
     
     # Aplicar normalização
-    if st.button("Aplicar Normalização"):
-        df_normalizado = df.copy()
-        
+    if not st.session_state.normalizacao_preview and st.button("Aplicar Normalização"):
+        if metodo == "Logarítmica":
+            # Só aplica log se todos valores forem positivos
+            positivas = [col for col in colunas_selecionadas if (df[col] > 0).all()]
+            for col in set(colunas_selecionadas) - set(positivas):
+                st.warning(f"Não foi possível aplicar log na coluna {col} (contém valores <= 0)")
+            colunas_selecionadas = positivas
+
         try:
-            if metodo == "MinMax (0-1)":
-                scaler = MinMaxScaler()
-                df_normalizado[colunas_selecionadas] = scaler.fit_transform(df[colunas_selecionadas])
-                
-            elif metodo == "Padronização (Z-score)":
-                scaler = StandardScaler()
-                df_normalizado[colunas_selecionadas] = scaler.fit_transform(df[colunas_selecionadas])
-                
-            elif metodo == "Logarítmica":
-                for col in colunas_selecionadas:
-                    if (df[col] > 0).all():  # Só aplica log se todos valores forem positivos
-                        df_normalizado[col] = np.log(df[col])
-                    else:
-                        st.warning(f"Não foi possível aplicar log na coluna {col} (contém valores <= 0)")
-            
+            versioned_dataset.registrar_transformador(
+                f"Normalização {metodo}",
+                preprocessing_pipeline.NumericScaler(metodo=metodo, colunas=colunas_selecionadas)
+            )
+            st.session_state.normalizacao_preview = True
             st.success("Normalização aplicada com sucesso!")
-            st.dataframe(df_normalizado.head(5))
-            col1, col2 = st.columns(2)
-
-            # Botões de controle
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("⏪ Desfazer Normalização"):
-                    df_normalizado = st.session_state.df_original.copy()
-                    st.session_state.df = st.session_state.df_original.copy()
-                    st.rerun()
-            
-            with col2:
-                if st.button("💾 Gravar Alterações"):
-                    st.session_state.df = df_normalizado.copy()
-                    st.success("Alterações gravadas com sucesso!")
-                    st.session_state.normalization = True
-                    st.rerun()
-
         except Exception as e:
             st.error(f"Erro ao normalizar: {str(e)}")
             return df
-    if st.button("✅ Finalizar normalização"):
+
+    if st.session_state.normalizacao_preview:
+        st.dataframe(st.session_state.df.head(5))
+
+        # Botões de controle
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⏪ Desfazer Normalização"):
+                versioned_dataset.desfazer_etapa()
+                st.session_state.normalizacao_preview = False
+                st.rerun()
+        
+        with col2:
+            if st.button("💾 Gravar Alterações"):
+                st.session_state.normalizacao_preview = False
+                st.session_state.normalization = True
+                st.rerun()
+
+    elif st.button("✅ Finalizar normalização"):
         st.session_state.normalization = True
         st.rerun()
     
-    return df
+    return st.session_state.df
@@ -1,15 +1,108 @@
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.figure import Figure
+import numpy as np
 import pandas as pd
+from scipy.stats import gaussian_kde
 
 from functions import (
     time_spinner,
+    versioned_dataset,
 )
 
+# Limites de pontos usados nos gráficos (independentes do tamanho do dataset)
+AMOSTRA_KDE = 5_000
+MAX_FLIERS = 2_000
+MAX_BINS = 100
+
 def get_numeric_columns(df):
-    """Retorna colunas numéricas do DataFrame"""
-    return df.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    """Retorna colunas numéricas do DataFrame (qualquer largura de int/float, sem bool)"""
+    return df.select_dtypes(include='number').columns.tolist()
+
+def filtrar_limiar(df, coluna, limiar):
+    """Mantém apenas as linhas com valores da coluna até o limiar."""
+    return df[df[coluna] <= limiar]
+
+def valores_ordenados(df, coluna):
+    """Valores não nulos da coluna em ordem crescente (float64), base das consultas de limiar."""
+    valores = df[coluna].to_numpy(dtype='float64', na_value=np.nan)
+    valores = valores[~np.isnan(valores)]
+    valores.sort()
+    return valores
+
+def ordenados_da_versao(coluna):
+    """Array ordenado da coluna, calculado uma única vez por versão do dataset."""
+    dataset = versioned_dataset.dataset_atual()
+    return dataset.memo(f"ordenados:{coluna}", lambda d: valores_ordenados(d, coluna))
+
+def quantil_ordenado(ordenados, q):
+    """Quantil com interpolação linear (mesmo critério do pandas) em O(1) sobre o array ordenado."""
+    if not len(ordenados):
+        return np.nan
+    posicao = q * (len(ordenados) - 1)
+    abaixo = int(np.floor(posicao))
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    return ordenados[abaixo] + (posicao - abaixo) * (ordenados[acima] - ordenados[abaixo])
+
+def limites_iqr(ordenados, iqr_factor=1.5):
+    """
+    Limites IQR e quantidade de outliers a partir do array ordenado, em O(log n).
+
+    Returns:
+        Tuple: (limite_inferior, limite_superior, quantidade_outliers)
+    """
+    q1 = quantil_ordenado(ordenados, 0.25)
+    q3 = quantil_ordenado(ordenados, 0.75)
+    iqr = q3 - q1
+    limite_inferior = q1 - (iqr_factor * iqr)
+    limite_superior = q3 + (iqr_factor * iqr)
+    n_outliers = (np.searchsorted(ordenados, limite_inferior, side='left')
+                  + len(ordenados) - np.searchsorted(ordenados, limite_superior, side='right'))
+    return limite_inferior, limite_superior, int(n_outliers)
+
+def limiar_por_percentual(ordenados, percentual, total_registros, padrao):
+    """Valor a partir do qual ficam `percentual`% dos registros acima (O(1) no array ordenado)."""
+    n_acima = max(0, int((percentual / 100) * total_registros))
+    if n_acima >= len(ordenados):
+        return padrao
+    return ordenados[len(ordenados) - 1 - n_acima]
+
+def perfil_outliers(df, colunas, iqr_factor=1.5):
+    """
+    Limites IQR e outliers de várias colunas em uma única passada NumPy
+    
+    Args:
+        df: DataFrame pandas
+        colunas: Colunas numéricas a analisar
+        iqr_factor: Fator multiplicador do IQR (padrão 1.5)
+    
+    Returns:
+        DataFrame com uma linha por coluna
+    """
+    valores = df[colunas].to_numpy(dtype='float64', na_value=np.nan)
+    q1, q3 = np.nanquantile(valores, [0.25, 0.75], axis=0)
+    iqr = q3 - q1
+    limite_inferior = q1 - (iqr_factor * iqr)
+    limite_superior = q3 + (iqr_factor * iqr)
+    n_outliers = ((valores < limite_inferior) | (valores > limite_superior)).sum(axis=0)
+    
+    return pd.DataFrame({
+        'Q1': q1,
+        'Q3': q3,
+        'IQR': iqr,
+        'Limite inferior': limite_inferior,
+        'Limite superior': limite_superior,
+        'Outliers': n_outliers,
+        'Percentual (%)': np.round(n_outliers / max(len(df), 1) * 100, 2),
+    }, index=pd.Index(colunas, name='Coluna'))
+
+def filtrar_limites(df, limites):
+    """Remove as linhas fora dos limites {coluna: (inferior, superior)} com uma única máscara."""
+    colunas = list(limites)
+    valores = df[colunas].to_numpy(dtype='float64', na_value=np.nan)
+    inferior = np.array([limites[col][0] for col in colunas])
+    superior = np.array([limites[col][1] for col in colunas])
+    fora = ((valores < inferior) | (valores > superior)).any(axis=1)
+    return df[~fora]
 
 def detectar_outliers(df, coluna, iqr_factor=1.5):
     """
@@ -37,6 +130,85 @@ def detectar_outliers(df, coluna, iqr_factor=1.5):
     
     return limite_inferior, limite_superior, outliers
 
+def _amostra_espacada(ordenados, tamanho):
+    """Amostra determinística de um array ordenado (pontos igualmente espaçados nos quantis)."""
+    if len(ordenados) <= tamanho:
+        return ordenados
+    return ordenados[np.linspace(0, len(ordenados) - 1, tamanho).astype(np.intp)]
+
+def _n_bins(ordenados, iqr):
+    """
+    Quantidade de classes do critério 'auto' do numpy (mínimo entre Freedman-Diaconis
+    e Sturges), limitada a MAX_BINS antes de qualquer borda ser alocada.
+    """
+    n = len(ordenados)
+    amplitude = ordenados[-1] - ordenados[0] if n else 0
+    if n < 2 or amplitude <= 0:
+        return 1
+    largura = amplitude / (np.log2(n) + 1)
+    if iqr > 0:
+        largura = min(largura, 2 * iqr * n ** (-1 / 3))
+    return int(min(np.ceil(amplitude / largura), MAX_BINS))
+
+def estatisticas_grafico(ordenados, iqr_factor=1.5):
+    """
+    Estatísticas do boxplot, histograma e KDE a partir do array ordenado da coluna
+    
+    O histograma usa todos os valores; a KDE e os outliers desenhados usam amostras limitadas.
+    
+    Returns:
+        Dict com 'box', 'contagens', 'bordas', 'grade' e 'densidade'
+    """
+    q1 = quantil_ordenado(ordenados, 0.25)
+    q3 = quantil_ordenado(ordenados, 0.75)
+    lim_inf = q1 - iqr_factor * (q3 - q1)
+    lim_sup = q3 + iqr_factor * (q3 - q1)
+    inicio = np.searchsorted(ordenados, lim_inf, side='left')
+    fim = np.searchsorted(ordenados, lim_sup, side='right')
+    fliers = np.concatenate([ordenados[:inicio], ordenados[fim:]])
+    
+    box = {
+        'med': quantil_ordenado(ordenados, 0.5),
+        'q1': q1,
+        'q3': q3,
+        'whislo': ordenados[inicio] if fim > inicio else q1,
+        'whishi': ordenados[fim - 1] if fim > inicio else q3,
+        'fliers': _amostra_espacada(fliers, MAX_FLIERS),
+    }
+    
+    contagens, bordas = np.histogram(ordenados, bins=_n_bins(ordenados, q3 - q1))
+    
+    grade, densidade = None, None
+    amostra = _amostra_espacada(ordenados, AMOSTRA_KDE)
+    if len(amostra) > 1 and amostra[0] != amostra[-1]:
+        grade = np.linspace(bordas[0], bordas[-1], 200)
+        # Mesma escala do histograma (contagens), como no histplot(kde=True)
+        densidade = gaussian_kde(amostra)(grade) * len(ordenados) * np.diff(bordas).mean()
+    
+    return {'box': box, 'contagens': contagens, 'bordas': bordas, 'grade': grade, 'densidade': densidade}
+
+def desenhar_outliers(estatisticas, coluna):
+    """Monta a figura de boxplot e histograma a partir das estatísticas pré-calculadas."""
+    fig = Figure(figsize=(12, 6))
+    ax1, ax2 = fig.subplots(1, 2)
+    
+    # Boxplot
+    ax1.bxp([estatisticas['box']], showfliers=True)
+    ax1.set_xticks([])
+    ax1.set_ylabel(coluna)
+    ax1.set_title(f'Boxplot de {coluna}')
+    
+    # Histograma
+    ax2.stairs(estatisticas['contagens'], estatisticas['bordas'], fill=True, alpha=0.6)
+    if estatisticas['densidade'] is not None:
+        ax2.plot(estatisticas['grade'], estatisticas['densidade'])
+    ax2.set_xlabel(coluna)
+    ax2.set_ylabel('Count')
+    ax2.set_title(f'Distribuição de {coluna}')
+    
+    fig.tight_layout()
+    return fig
+
 def plot_outliers(df, coluna):
     """
     Gera visualizações para análise de outliers
@@ -48,18 +220,61 @@ def plot_outliers(df, coluna):
     Returns:
         matplotlib Figure object
     """
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 6))
+    return desenhar_outliers(estatisticas_grafico(valores_ordenados(df, coluna)), coluna)
+
+def figura_da_versao(coluna):
+    """Figura de outliers da coluna, montada uma única vez por versão do dataset."""
+    dataset = versioned_dataset.dataset_atual()
+    return dataset.memo(
+        f"figura_outliers:{coluna}",
+        lambda d: desenhar_outliers(estatisticas_grafico(ordenados_da_versao(coluna)), coluna)
+    )
+
+def analisar_todas_colunas(df, numeric_cols):
+    """
+    Resumo de outliers de todas as colunas numéricas e corte em várias colunas de uma vez
     
-    # Boxplot
-    sns.boxplot(y=df[coluna], ax=ax1)
-    ax1.set_title(f'Boxplot de {coluna}')
+    Args:
+        df: DataFrame pandas
+        numeric_cols: Lista de colunas numéricas
+    """
+    dataset = versioned_dataset.dataset_atual()
+    perfil = dataset.memo("perfil_outliers", lambda d: perfil_outliers(d, numeric_cols))
     
-    # Histograma
-    sns.histplot(df[coluna], kde=True, ax=ax2)
-    ax2.set_title(f'Distribuição de {coluna}')
+    st.dataframe(
+        perfil.sort_values('Outliers', ascending=False),
+        use_container_width=True,
+        column_config={
+            'Percentual (%)': st.column_config.ProgressColumn(
+                'Percentual (%)', format="%.2f%%", min_value=0, max_value=100
+            ),
+        }
+    )
     
-    plt.tight_layout()
-    return fig
+    com_outliers = perfil.index[perfil['Outliers'] > 0].tolist()
+    if not com_outliers:
+        st.success("Nenhuma coluna com outliers pelo critério IQR.")
+        return
+    
+    colunas_corte = st.multiselect(
+        "Colunas para remover os outliers (limites IQR):",
+        options=com_outliers,
+        default=com_outliers,
+        key="colunas_corte_outliers"
+    )
+    
+    if colunas_corte and st.button("✂️ Aplicar Corte nas Colunas Selecionadas"):
+        limites = {
+            col: (float(perfil.at[col, 'Limite inferior']), float(perfil.at[col, 'Limite superior']))
+            for col in colunas_corte
+        }
+        novo = versioned_dataset.registrar_etapa(
+            f"Corte de outliers (IQR) em {len(colunas_corte)} colunas",
+            filtrar_limites,
+            limites=limites
+        )
+        st.success(f"{len(df) - len(novo.df)} linhas removidas!")
+        st.rerun()
 
 def handle_outliers(df, numeric_cols=None):
     """
@@ -82,68 +297,80 @@ def handle_outliers(df, numeric_cols=None):
     with st.expander("📊 Detecção de Outliers", expanded=True):
         st.header("Identificação de Outliers")
 
-        coluna_analise = st.selectbox(
-            "Selecione a coluna para análise:",
-            options=numeric_cols[::-1],
-            key="coluna_outlier"
+        modo = st.radio(
+            "Modo de análise:",
+            ["Coluna individual", "Todas as colunas numéricas"],
+            horizontal=True,
+            key="modo_outlier"
         )
+
+        if modo == "Todas as colunas numéricas":
+            analisar_todas_colunas(df, numeric_cols)
+        else:
+            coluna_analise = st.selectbox(
+                "Selecione a coluna para análise:",
+                options=numeric_cols[::-1],
+                key="coluna_outlier"
+            )
         
-        if coluna_analise:
-            try:
-                lim_inf, lim_sup, outliers = detectar_outliers(df, coluna_analise)
-                total_registros = len(df[coluna_analise])
-                percent_outliers = min(round((len(outliers) / total_registros) * 100, 2), 100.00)
+            if coluna_analise:
+                try:
+                    ordenados = ordenados_da_versao(coluna_analise)
+                    lim_inf, lim_sup, n_outliers = limites_iqr(ordenados)
+                    total_registros = len(df)
+                    percent_outliers = min(round((n_outliers / total_registros) * 100, 2), 100.00)
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Limite inferior", f"{round(lim_inf, 2)}")
-                    st.metric("Limite superior", f"{round(lim_sup, 2)}")
-                with col2:
-                    st.metric("Outliers encontrados", len(outliers))
-                    st.metric("Percentual de outliers", f"{percent_outliers}%")
-                if len(outliers):
-
-                    loading = time_spinner.spinner_personalizado("Analisando outliers...")
-                    st.empty()
-                    fig = plot_outliers(df, coluna_analise)
-                    loading.empty()
-                    st.pyplot(fig)
-                    
-                    # Seção de ajuste de outliers
-                    st.markdown("---")
-                    st.subheader("🔧 Ajuste de Outliers")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Limite inferior", f"{round(lim_inf, 2)}")
+                        st.metric("Limite superior", f"{round(lim_sup, 2)}")
+                    with col2:
+                        st.metric("Outliers encontrados", n_outliers)
+                        st.metric("Percentual de outliers", f"{percent_outliers}%")
+                    if n_outliers:
+
+                        loading = time_spinner.spinner_personalizado("Analisando outliers...")
+                        st.empty()
+                        fig = figura_da_versao(coluna_analise)
+                        loading.empty()
+                        st.pyplot(fig)
                     
-                    # Slider para ajuste percentual
-                    percentual_desejado = st.slider(
-                        "Percentual máximo de outliers a manter:",
-                        min_value=0.0,
-                        max_value=float(percent_outliers),
-                        value=float(percent_outliers),
-                        step=0.1,
-                        format="%.1f%%",
-                        help="Ajuste para controlar quantos outliers deseja manter"
-                    )
+                        # Seção de ajuste de outliers
+                        st.markdown("---")
+                        st.subheader("🔧 Ajuste de Outliers")
                     
-                    # Cálculo do novo limiar
-                    sorted_values = df[coluna_analise].sort_values(ascending=False).values
-                    n_outliers_desejados = max(0, int((percentual_desejado / 100) * total_registros))
+                        # Slider para ajuste percentual
+                        percentual_desejado = st.slider(
+                            "Percentual máximo de outliers a manter:",
+                            min_value=0.0,
+                            max_value=float(percent_outliers),
+                            value=float(percent_outliers),
+                            step=0.1,
+                            format="%.1f%%",
+                            help="Ajuste para controlar quantos outliers deseja manter"
+                        )
                     
-                    novo_limiar = (round(sorted_values[n_outliers_desejados], 2) 
-                                if n_outliers_desejados < len(sorted_values) 
-                                else round(lim_sup, 2))
+                        # Cálculo do novo limiar (busca no array ordenado da versão, sem reordenar)
+                        novo_limiar = round(
+                            limiar_por_percentual(ordenados, percentual_desejado, total_registros, lim_sup), 2
+                        )
                     
-                    # Visualização do impacto
-                    st.info(f"**Limiar calculado:** `{novo_limiar}` (removerá valores acima deste)")
+                        # Visualização do impacto
+                        st.info(f"**Limiar calculado:** `{novo_limiar}` (removerá valores acima deste)")
                     
-                    # Botão de aplicação
-                    if st.button("✂️ Aplicar Corte", help="Remove os outliers conforme o limiar definido"):
-                        df = df[df[coluna_analise] <= novo_limiar].copy()
-                        st.session_state.df = df
-                        st.success("Dados atualizados com sucesso!")
-                        st.rerun()
+                        # Botão de aplicação
+                        if st.button("✂️ Aplicar Corte", help="Remove os outliers conforme o limiar definido"):
+                            versioned_dataset.registrar_etapa(
+                                f"Corte de outliers em {coluna_analise}",
+                                filtrar_limiar,
+                                coluna=coluna_analise,
+                                limiar=novo_limiar
+                            )
+                            st.success("Dados atualizados com sucesso!")
+                            st.rerun()
                     
-            except Exception as e:
-                st.error(f"Erro ao analisar a coluna: {str(e)}")
+                except Exception as e:
+                    st.error(f"Erro ao analisar a coluna: {str(e)}")
     
     # Botão para finalizar
     if st.button("✅ Finalizar análise de outliers"):
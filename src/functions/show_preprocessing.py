@@ -1,7 +1,44 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
+import io
+
+import joblib
 import streamlit as st
 
+from functions import data_splitting, preprocessing_pipeline, split_indices, versioned_dataset
+
+def show_pipeline_export():
+    """Lista as etapas registradas e exporta o pipeline ajustado para a escoragem."""
+    dataset = versioned_dataset.dataset_atual()
+    if dataset is None:
+        return
+
+    with st.expander("📦 Pipeline de pré-processamento", expanded=False):
+        etapas = dataset.etapas
+        if not etapas:
+            st.info("Nenhuma etapa de pré-processamento registrada.")
+            return
+
+        for i, etapa in enumerate(etapas, start=1):
+            escopo = "escoragem" if 'transformador' in etapa.params else "apenas treino"
+            st.write(f"{i}. {etapa.nome} *({escopo})*")
+
+        pipeline = preprocessing_pipeline.montar_pipeline(etapas)
+        if pipeline is None:
+            st.info("Nenhuma etapa precisa ser reaplicada na escoragem.")
+            return
+
+        if st.button("💾 Gravar pipeline junto ao modelo"):
+            caminho = preprocessing_pipeline.salvar_pipeline(pipeline)
+            st.success(f"Pipeline gravado em {caminho}")
+
+        buffer = io.BytesIO()
+        joblib.dump(pipeline, buffer)
+        st.download_button(
+            "📥 Baixar pipeline (.pkl)",
+            data=buffer.getvalue(),
+            file_name=preprocessing_pipeline.PIPELINE_PATH.name,
+            mime="application/octet-stream"
+        )
+
 def show_preprocessing_results():
     """Exibe os resultados do pré-processamento realizado."""
     with st.expander("📊 Resultados do Pré-processamento", expanded=True):
@@ -11,77 +48,54 @@ def show_preprocessing_results():
         def toggle_botao():
             st.session_state.botao_clicado = not st.session_state.botao_clicado
         
-        def toggle_gravar(df_treino, df_validation, df_teste):
-            st.session_state.df_treino = df_treino
-            st.session_state.df_validation = df_validation
-            st.session_state.df_teste = df_teste
+        def gravar_indices(indices, dobras):
+            # Guarda só as posições das linhas: as partições compartilham o df da sessão
+            st.session_state.divisao = split_indices.DivisaoDados(df, indices, dobras=dobras)
 
         if 'botao_clicado' not in st.session_state:
             st.session_state.botao_clicado = False
         
-        if st.session_state.df_treino is not None:
+        divisao = st.session_state.divisao
+        if divisao is not None:
             st.subheader("Remover colunas")
             
             # 1. Mostra o DataFrame atual
-            st.write("DataFrame atual:", st.session_state.df_treino.head())
+            st.write("DataFrame atual:", divisao.amostra('treino'))
             
             # 2. Widget para selecionar colunas a remover
             colunas_para_remover = st.multiselect(
                 "Selecione as colunas para remover:",
-                options=st.session_state.df_treino.columns.tolist()
+                options=divisao.colunas
             )
             
             # 3. Botão para confirmar a remoção
             if st.button("Remover colunas selecionadas"):
                 if colunas_para_remover:
-                    # Remove as colunas selecionadas
-                    st.session_state.df_treino = st.session_state.df_treino.drop(columns=colunas_para_remover)
-                    st.session_state.df_validation = st.session_state.df_validation.drop(columns=colunas_para_remover)
-                    st.session_state.df_teste = st.session_state.df_teste.drop(columns=colunas_para_remover)
+                    # Remove as colunas selecionadas das três partições de uma vez, sem copiar os dados
+                    st.session_state.divisao = divisao.remover_colunas(colunas_para_remover)
+                    st.session_state.clean_df = True
                     st.success(f"Colunas removidas: {', '.join(colunas_para_remover)} => Clique em Modelagem para continuar")
                     st.rerun()  
-                    st.session_state.clean_df = True
                 else:
                     st.warning("Nenhuma coluna selecionada!")
             
         else:
             if st.session_state.botao_clicado:
-                if split['method'] == 'temporal':
-                    df['data'] = pd.to_datetime(df[split['column']], format='%d/%m/%Y')
-
-                    data_corte = pd.to_datetime(split['train']['end'], format='%m/%Y')
-
-                    df_treino = df[df['data'] <= data_corte].drop('data', axis=1)
-                    st.write(f"**Total de Registros para Treino: {len(df_treino)}**")
-                    st.dataframe(df_treino.head())
-
-                    df_temp = df[df['data'] > data_corte]
-
-                    data_corte2 = pd.to_datetime(split['validation']['end'], format='%m/%Y')
-
-                    df_validation = df_temp[df_temp['data'] <= data_corte2].drop('data', axis=1)
-                    st.write(f"**Total de Registros para Validação: {len(df_validation)}**")
-                    st.dataframe(df_validation.head())
-
-                    df_teste = df_temp[df_temp['data'] > data_corte2].drop('data', axis=1)
-                    st.write(f"**Total de Registros para Teste: {len(df_teste)}**")            
-                    st.dataframe(df_teste.head())
-                    st.button("Gravar dados", on_click=toggle_gravar(df_treino, df_validation, df_teste))
-
-                elif split['method'] == 'percentage':                
-                    df_treino, temp_df = train_test_split(df, test_size=(100 - split['train'])/100, random_state=42)
-                    proporcao_teste = split['test'] / (split['validation'] + split['test'])
-                    df_validation, df_teste = train_test_split(temp_df, test_size=proporcao_teste, random_state=42)
-
-                    st.write(f"**Total de Registros para Treino: {len(df_treino)}**")
-                    st.dataframe(df_treino.head())
-                    st.write(f"**Total de Registros para Validação: {len(df_validation)}**")
-                    st.dataframe(df_validation.head())
-                    st.write(f"**Total de Registros para Teste: {len(df_teste)}**")
-                    st.dataframe(df_teste.head())
-                    st.button("Gravar dados", on_click=toggle_gravar(df_treino, df_validation, df_teste))
-                else:
+                indices, dobras = split_indices.calcular_divisao(df, split)
+                if indices is None:
                     st.subheader("Ainda nao implementado")
+                elif split['method'] in ('temporal', 'walk_forward'):
+                    sem_data = len(df) - sum(len(posicoes) for posicoes in indices.values())
+                    if sem_data:
+                        st.warning(f"⚠️ {sem_data} registros sem data em {split['column']} ficaram fora da divisão")
+
+                if indices is not None:
+                    data_splitting.mostrar_tamanhos(indices, dobras)
+
+                    for nome, titulo in zip(split_indices.PARTICOES, ["Treino", "Validação", "Teste"]):
+                        st.write(f"**Amostra de {titulo}**")
+                        st.dataframe(df.iloc[indices[nome][:5]])
+                    st.button("Gravar dados", on_click=gravar_indices, args=(indices, dobras))
                 
             else:
                 if st.session_state.split['method'] == 'temporal':
@@ -102,6 +116,20 @@ def show_preprocessing_results():
                         st.metric(".", '.')
                         st.metric("Teste", f"{split['test']['start']} > {split['test']['end']} ")
 
+                elif split['method'] == 'walk_forward':
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Total de Registros", len(df))
+                        st.metric("Split", 'Walk-forward')
+
+                    with col2:
+                        st.metric("Total de Colunas", len(df.columns))
+                        st.metric("Coluna", f"{split['column']}")
+
+                    with col3:
+                        st.metric("Targuet", f"{target}")
+                        st.metric("Janelas", f"{split['windows']} × {split['months']} mês(es)")
+
                 else:
                     # Mostra estatísticas básicas
                     col1, col2, col3 = st.columns(3)
@@ -129,3 +157,5 @@ def show_preprocessing_results():
         # if st.button("Salvar Pré-processamento e Continuar"):
         #     st.session_state.preprocessing_complete = True
         #     st.rerun()
+
+    show_pipeline_export()
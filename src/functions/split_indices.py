@@ -0,0 +1,283 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from functions import versioned_dataset
+
+# Nomes das partições, na ordem em que são exibidas
+PARTICOES = ("treino", "validacao", "teste")
+
+
+def ordenar_por_data(serie):
+    """
+    Ordena as linhas pela coluna de data uma única vez.
+
+    Args:
+        serie: Coluna datetime64 (ou texto dd/mm/aaaa, convertido aqui)
+
+    Returns:
+        Tuple: (posições das linhas com data válida em ordem cronológica,
+                datas datetime64 nessa mesma ordem)
+    """
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        serie = pd.to_datetime(serie, dayfirst=True, errors='coerce')
+    valores = serie.to_numpy(dtype='datetime64[ns]')
+    validas = np.flatnonzero(~np.isnat(valores))
+    ordem = validas[np.argsort(valores[validas], kind='stable')]
+    return ordem, valores[ordem]
+
+
+def ordem_da_versao(coluna, dataset=None):
+    """Ordenação pela coluna de data calculada uma única vez por versão do dataset."""
+    dataset = dataset or versioned_dataset.dataset_atual()
+    return dataset.memo(f"ordem_data:{coluna}", lambda df: ordenar_por_data(df[coluna]))
+
+
+def _inicio_mes_seguinte(mes):
+    """Primeiro instante do mês seguinte a `mes` (texto mm/aaaa)."""
+    periodo = pd.Period(pd.to_datetime(mes, format='%m/%Y'), freq='M') + 1
+    return periodo.start_time.to_datetime64()
+
+
+def split_temporal(ordem, datas_ordenadas, fim_treino, fim_validacao):
+    """
+    Divisão temporal por busca binária nas datas já ordenadas.
+
+    Args:
+        ordem, datas_ordenadas: Resultado de ordenar_por_data
+        fim_treino: Último mês do treino (mm/aaaa, inclusive)
+        fim_validacao: Último mês da validação (mm/aaaa, inclusive)
+
+    Returns:
+        Dict {partição: array de posições das linhas}
+    """
+    corte_treino = np.searchsorted(datas_ordenadas, _inicio_mes_seguinte(fim_treino), side='left')
+    corte_validacao = np.searchsorted(datas_ordenadas, _inicio_mes_seguinte(fim_validacao), side='left')
+    corte_validacao = max(corte_validacao, corte_treino)
+    return {
+        "treino": ordem[:corte_treino],
+        "validacao": ordem[corte_treino:corte_validacao],
+        "teste": ordem[corte_validacao:],
+    }
+
+
+def split_percentual(n_linhas, validacao, teste, random_state=42):
+    """
+    Divisão aleatória por porcentagem, feita sobre as posições das linhas.
+
+    Sorteia as mesmas linhas que o train_test_split aplicado ao DataFrame.
+
+    Args:
+        n_linhas: Quantidade de linhas do dataset
+        validacao, teste: Porcentagens (0-100) de validação e teste
+
+    Returns:
+        Dict {partição: array de posições das linhas}
+    """
+    posicoes = np.arange(n_linhas)
+    treino, resto = train_test_split(posicoes, test_size=(validacao + teste) / 100, random_state=random_state)
+    proporcao_teste = teste / (validacao + teste)
+    validacao, teste = train_test_split(resto, test_size=proporcao_teste, random_state=random_state)
+    return {"treino": treino, "validacao": validacao, "teste": teste}
+
+
+def _fracoes_por_particao(fracao, validacao, teste):
+    """Parte as linhas pela posição relativa `fracao` (0-1) de cada uma."""
+    limites = np.array([1 - (validacao + teste) / 100, 1 - teste / 100])
+    rotulos = np.searchsorted(limites, fracao, side='right')
+    return {nome: np.flatnonzero(rotulos == i) for i, nome in enumerate(PARTICOES)}
+
+
+def _fracoes_por_dobra(fracao, n_dobras):
+    """Dobras de validação cruzada pela posição relativa `fracao` de cada linha."""
+    dobras = np.minimum((fracao * n_dobras).astype(np.intp), n_dobras - 1)
+    return [(np.flatnonzero(dobras != k), np.flatnonzero(dobras == k)) for k in range(n_dobras)]
+
+
+def fracao_estratificada(y, random_state=42):
+    """
+    Posição relativa (0-1) de cada linha dentro da sua classe, em ordem sorteada.
+
+    Cortar essas posições nos mesmos limites mantém a proporção de cada classe
+    do target em todas as partições.
+    """
+    codigos, _ = pd.factorize(pd.Series(y), use_na_sentinel=False)
+    sorteio = np.random.default_rng(random_state).permutation(len(codigos))
+    ordem = sorteio[np.argsort(codigos[sorteio], kind='stable')]
+    contagens = np.bincount(codigos)
+    inicios = np.cumsum(contagens) - contagens
+    classes = codigos[ordem]
+    fracao = np.empty(len(codigos))
+    fracao[ordem] = (np.arange(len(ordem)) - inicios[classes] + 0.5) / contagens[classes]
+    return fracao
+
+
+def fracao_por_grupo(grupos, random_state=42):
+    """
+    Posição relativa (0-1) de cada linha, igual para todas as linhas do mesmo grupo.
+
+    Os grupos são sorteados e acumulados pelo número de linhas, então um grupo
+    (ex: um id_cliente) nunca fica dividido entre duas partições.
+    """
+    codigos, unicos = pd.factorize(pd.Series(grupos), use_na_sentinel=False)
+    contagens = np.bincount(codigos, minlength=len(unicos))
+    sorteio = np.random.default_rng(random_state).permutation(len(unicos))
+    fracao_grupo = np.empty(len(unicos))
+    fracao_grupo[sorteio] = (np.cumsum(contagens[sorteio]) - contagens[sorteio] / 2) / len(codigos)
+    return fracao_grupo[codigos]
+
+
+def split_estratificado(y, validacao, teste, random_state=42):
+    """Divisão por porcentagem estratificada pelo target (`y`)."""
+    return _fracoes_por_particao(fracao_estratificada(y, random_state), validacao, teste)
+
+
+def split_por_grupo(grupos, validacao, teste, random_state=42):
+    """Divisão por porcentagem (em linhas) sem separar as linhas de um mesmo grupo."""
+    return _fracoes_por_particao(fracao_por_grupo(grupos, random_state), validacao, teste)
+
+
+def dobras_estratificadas(y, n_dobras=5, random_state=42):
+    """Dobras de validação cruzada estratificadas pelo target, como posições em `y`."""
+    return _fracoes_por_dobra(fracao_estratificada(y, random_state), n_dobras)
+
+
+def dobras_por_grupo(grupos, n_dobras=5, random_state=42):
+    """Dobras de validação cruzada em que cada grupo aparece em uma única dobra de teste."""
+    return _fracoes_por_dobra(fracao_por_grupo(grupos, random_state), n_dobras)
+
+
+def split_walk_forward(ordem, datas_ordenadas, n_janelas=3, meses_janela=1, meses_treino=None):
+    """
+    Divisão temporal com origem móvel (walk-forward).
+
+    O teste são os últimos `meses_janela` meses e a validação a janela anterior;
+    o treino é todo o período antes dela. As dobras avançam a origem janela a
+    janela sobre treino + validação (a última dobra testa a própria validação).
+
+    Args:
+        ordem, datas_ordenadas: Resultado de ordenar_por_data
+        n_janelas: Quantidade de dobras de validação cruzada
+        meses_janela: Meses em cada janela de validação/teste
+        meses_treino: Limita o treino de cada dobra aos últimos meses (None = todo o histórico)
+
+    Returns:
+        Tuple: (Dict {partição: posições das linhas},
+                lista de (posições de treino, posições de teste) em treino + validação)
+    """
+    meses = np.unique(datas_ordenadas.astype('datetime64[M]'))
+    if len(meses) < (n_janelas + 1) * meses_janela + 1:
+        raise ValueError(
+            f"São necessários ao menos {(n_janelas + 1) * meses_janela + 1} meses "
+            f"para {n_janelas} janelas de {meses_janela} mês(es); o dataset tem {len(meses)}"
+        )
+    # Posição em que cada mês começa nas datas ordenadas (um único searchsorted)
+    limites = np.append(meses, meses[-1] + 1).astype('datetime64[ns]')
+    cortes = np.searchsorted(datas_ordenadas, limites, side='left')
+
+    inicio_teste = cortes[-1 - meses_janela]
+    inicio_validacao = cortes[-1 - 2 * meses_janela]
+    indices = {
+        "treino": ordem[:inicio_validacao],
+        "validacao": ordem[inicio_validacao:inicio_teste],
+        "teste": ordem[inicio_teste:],
+    }
+
+    # Treino + validação estão em ordem cronológica e contíguos em `ordem`,
+    # então cada dobra é só um par de intervalos de posições
+    dobras = []
+    for k in range(n_janelas, 0, -1):
+        origem = len(meses) - (k + 1) * meses_janela
+        fim = origem + meses_janela
+        inicio_treino = 0 if meses_treino is None else cortes[max(origem - meses_treino, 0)]
+        dobras.append((np.arange(inicio_treino, cortes[origem]), np.arange(cortes[origem], cortes[fim])))
+    return indices, dobras
+
+
+def calcular_divisao(df, split):
+    """
+    Índices das partições e dobras de validação cruzada da divisão escolhida.
+
+    Args:
+        df: DataFrame da versão atual
+        split: Dicionário guardado por data_splitting (st.session_state.split)
+
+    Returns:
+        Tuple: (Dict {partição: posições}, dobras ou None); (None, None) se o
+               método não for suportado
+    """
+    metodo = split['method']
+    if metodo == 'temporal':
+        ordem, datas = ordem_da_versao(split['column'])
+        return split_temporal(ordem, datas, split['train']['end'], split['validation']['end']), None
+    if metodo == 'walk_forward':
+        ordem, datas = ordem_da_versao(split['column'])
+        return split_walk_forward(ordem, datas, split['windows'], split['months'], split['train_months'])
+    if metodo == 'percentage':
+        return split_percentual(len(df), split['validation'], split['test']), None
+
+    if metodo == 'stratified':
+        dividir, dobrar = split_estratificado, dobras_estratificadas
+    elif metodo == 'group':
+        dividir, dobrar = split_por_grupo, dobras_por_grupo
+    else:
+        return None, None
+    coluna = df[split['column']]
+    indices = dividir(coluna, split['validation'], split['test'])
+    # As dobras usam só treino + validação, na mesma ordem de DivisaoDados.validacao_cruzada
+    desenvolvimento = np.concatenate([indices['treino'], indices['validacao']])
+    return indices, dobrar(coluna.iloc[desenvolvimento], split['folds'])
+
+
+class DivisaoDados:
+    """
+    Divisão treino/validação/teste como arrays de posições sobre um único DataFrame.
+
+    Nenhuma partição é copiada ao dividir: elas só são materializadas (um único
+    `iloc`) quando um modelo treina ou avalia.
+    """
+
+    def __init__(self, base, indices, colunas_removidas=(), dobras=None):
+        self.base = base
+        self.indices = {nome: np.asarray(indices[nome], dtype=np.intp) for nome in PARTICOES}
+        self.colunas_removidas = list(colunas_removidas)
+        # Dobras de validação cruzada, em posições de treino + validação (ver validacao_cruzada)
+        self.dobras = dobras
+
+    @property
+    def colunas(self):
+        """Colunas disponíveis para a modelagem."""
+        return [col for col in self.base.columns if col not in self.colunas_removidas]
+
+    def tamanhos(self):
+        return {nome: len(indices) for nome, indices in self.indices.items()}
+
+    def _posicoes_colunas(self):
+        return self.base.columns.get_indexer(self.colunas)
+
+    def particao(self, nome):
+        """DataFrame da partição `nome` ('treino', 'validacao' ou 'teste')."""
+        return self.base.iloc[self.indices[nome], self._posicoes_colunas()]
+
+    def amostra(self, nome, n=5):
+        """Primeiras `n` linhas da partição, sem materializar o restante."""
+        return self.base.iloc[self.indices[nome][:n], self._posicoes_colunas()]
+
+    def coluna(self, nome, coluna):
+        """Uma única coluna da partição (ex: o target)."""
+        return self.base[coluna].iloc[self.indices[nome]]
+
+    def remover_colunas(self, colunas):
+        """Nova divisão sem as colunas indicadas; os dados não são copiados."""
+        return DivisaoDados(self.base, self.indices, self.colunas_removidas + list(colunas), self.dobras)
+
+    def validacao_cruzada(self):
+        """
+        Treino + validação materializados uma única vez, com as dobras de validação cruzada.
+
+        Returns:
+            Tuple: (DataFrame, lista de (posições de treino, posições de teste));
+                   a lista serve direto como `cv=` do scikit-learn
+        """
+        posicoes = np.concatenate([self.indices['treino'], self.indices['validacao']])
+        return self.base.iloc[posicoes, self._posicoes_colunas()], self.dobras
@@ -0,0 +1,130 @@
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+import streamlit as st
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """Transformação registrada em uma versão do dataset."""
+    nome: str
+    func: Callable
+    params: dict = field(default_factory=dict)
+
+    def aplicar(self, df):
+        return self.func(df, **self.params)
+
+
+class VersionedDataset:
+    """
+    Dataset imutável e versionado.
+
+    Cada etapa do assistente gera uma nova versão que guarda apenas a transformação;
+    o DataFrame só é calculado quando a propriedade `df` é acessada. Com o
+    Copy-on-Write do pandas ativo, as colunas não alteradas por uma etapa são
+    compartilhadas entre as versões em vez de copiadas.
+    """
+
+    def __init__(self, df=None, anterior=None, etapa=None):
+        self._df = df
+        self.anterior = anterior
+        self.etapa = etapa
+        self.versao = uuid.uuid4().hex
+        self._memo = {}
+
+    @property
+    def df(self):
+        """DataFrame desta versão, materializado na primeira leitura."""
+        if self._df is None:
+            self._df = self.etapa.aplicar(self.anterior.df)
+            # Só a versão atual e a original ficam em memória; as intermediárias
+            # são recalculadas a partir da original se forem necessárias (ex: desfazer)
+            self.anterior._liberar()
+        return self._df
+
+    @property
+    def etapas(self):
+        """Lista das etapas aplicadas desde o dataset original."""
+        etapas = []
+        versao = self
+        while versao.etapa is not None:
+            etapas.append(versao.etapa)
+            versao = versao.anterior
+        return etapas[::-1]
+
+    def _liberar(self):
+        if self.anterior is not None:
+            self._df = None
+        # Estatísticas, arrays ordenados e figuras só interessam à versão exibida
+        self._memo.clear()
+
+    def aplicar(self, nome, func, **params):
+        """Registra uma transformação `func(df, **params)` e retorna a nova versão."""
+        return VersionedDataset(anterior=self, etapa=Etapa(nome, func, params))
+
+    def memo(self, chave, func):
+        """Guarda um resultado derivado desta versão (ex: estatísticas) para os próximos reruns."""
+        if chave not in self._memo:
+            self._memo[chave] = func(self.df)
+        return self._memo[chave]
+
+
+def dataset_atual():
+    """
+    Retorna o dataset versionado da sessão, sincronizado com st.session_state.df.
+
+    Se o DataFrame da sessão foi trocado por fora (ex: novo upload), uma nova versão
+    original é criada a partir dele.
+    """
+    df = st.session_state.get("df")
+    if df is None:
+        return None
+
+    dataset = st.session_state.get("dataset")
+    if dataset is None or dataset._df is not df:
+        dataset = VersionedDataset(df)
+        st.session_state.dataset = dataset
+    return dataset
+
+
+def _publicar(dataset):
+    st.session_state.dataset = dataset
+    st.session_state.df = dataset.df
+    return dataset
+
+
+def registrar_etapa(nome, func, **params):
+    """
+    Aplica uma transformação ao dataset da sessão como uma nova versão.
+
+    Args:
+        nome: Descrição da etapa (exibida no histórico)
+        func: Função `func(df, **params)` que retorna um novo DataFrame
+        **params: Parâmetros da transformação
+
+    Returns:
+        VersionedDataset: Nova versão do dataset
+    """
+    return _publicar(dataset_atual().aplicar(nome, func, **params))
+
+
+def registrar_transformador(nome, transformador):
+    """
+    Ajusta um transformador (fit) na versão atual e registra sua aplicação como etapa.
+
+    O transformador ajustado fica guardado na etapa e pode ser exportado no pipeline
+    de pré-processamento usado na escoragem.
+    """
+    from functions import preprocessing_pipeline
+
+    dataset = dataset_atual()
+    transformador.fit(dataset.df)
+    return registrar_etapa(nome, preprocessing_pipeline.transformar, transformador=transformador)
+
+
+def desfazer_etapa():
+    """Volta o dataset da sessão para a versão anterior."""
+    dataset = dataset_atual()
+    if dataset is not None and dataset.anterior is not None:
+        _publicar(dataset.anterior)
@@ -12,7 +12,8 @@ from functions import (
     data_splitting,
     config_buttons,
     show_preprocessing,
-    model_optimization
+    model_optimization,
+    versioned_dataset
 )
 
 def _setup_page_config():
@@ -30,17 +31,18 @@ def mostrar():
     _setup_page_config()
     
     if st.session_state.df is not None:
-        df = st.session_state.df.copy()
-        
-        colunas = df.columns.tolist()
-        numeric_cols = process_outliers.get_numeric_columns(df)
+        # Sem cópia: as etapas registram novas versões em vez de alterar o DataFrame
+        dataset = versioned_dataset.dataset_atual()
+        df = dataset.df
 
+        colunas = df.columns.tolist()
+        numeric_cols = dataset.memo("numeric_cols", process_outliers.get_numeric_columns)
 
-        if df.isnull().any().any():
-            faltantes_df = process_missing.get_missing_data_stats(df)
+        if dataset.memo("tem_faltantes", lambda d: bool(d.isna().any().any())):
+            faltantes_df = dataset.memo("faltantes", process_missing.get_missing_data_stats)
             df = process_missing.handle_missing_values(df, faltantes_df)
 
-        elif df.duplicated().any():
+        elif not st.session_state.duplicates_check:
             df = process_duplicates.check_duplicates(df)
         
         elif not st.session_state.outlier_check:
@@ -49,7 +51,6 @@ def mostrar():
         elif not st.session_state.datetime:
             df = process_datetime.datetime_options(df)
             st.session_state.datetime_processed = True
-            st.session_state.df = df 
 
         elif not st.session_state.normalization:
             process_normalization.normalizar_dataframe(df)
@@ -63,7 +64,7 @@ def mostrar():
         elif not st.session_state.split:
             data_splitting.data_splitting_options(df, colunas)
    
-        elif st.session_state.df_treino is None:
+        elif st.session_state.divisao is None:
             show_preprocessing.show_preprocessing_results()
 
         else:
@@ -3,16 +3,24 @@ import pandas as pd
 from pathlib import Path
 from typing import Optional, Union
 
+from functions import chunked_loading, compact_dtypes, dataset_cache
+
 # Configurações de tipos
 DataFrame = pd.DataFrame
 FileUploader = st.runtime.uploaded_file_manager.UploadedFile
 PathLike = Union[str, Path]
 
+# Arquivos acima deste tamanho são lidos automaticamente em blocos
+LIMITE_LEITURA_BLOCOS_MB = 200
+
 def newdata():
     st.session_state.df = None
+    st.session_state.dataset = None
+    st.session_state.duplicates_check = False
     st.session_state.outlier_check = False
     st.session_state.target = None
     st.session_state.split = None
+    st.session_state.divisao = None
     st.session_state.datetime = False
     st.session_state.normalization = False
     st.session_state.dummies = False
@@ -43,25 +51,71 @@ def _handle_file_upload():
     """Processa o upload de arquivos pelo usuário."""
     uploaded_file = st.file_uploader(
         "📤 Upload de Arquivo",
-        type=["csv", "xlsx", "xls", "json", "feather", "parquet"],
-        help="Formatos suportados: CSV, Excel (xlsx, xls), JSON, Feather, Parquet"
+        type=["csv", "xlsx", "xls", "json", "jsonl", "feather", "parquet"],
+        help="Formatos suportados: CSV, Excel (xlsx, xls), JSON, JSON lines, Feather, Parquet"
+    )
+    leitura_blocos = st.checkbox(
+        "📦 Leitura em blocos",
+        value=False,
+        help=(
+            "Lê CSV, JSON lines e Parquet em blocos, compactando os tipos durante a leitura. "
+            f"Ativada automaticamente para arquivos acima de {LIMITE_LEITURA_BLOCOS_MB} MB."
+        )
+    )
+    compactar = st.checkbox(
+        "🗜️ Compactar tipos ao carregar",
+        value=True,
+        help="Reduz inteiros/floats, converte flags (S/N) para bool e textos repetitivos para categoria",
+        key="compactar_tipos"
     )
 
     if uploaded_file:
-        df = _load_uploaded_file(uploaded_file)
+        em_blocos = leitura_blocos or uploaded_file.size > LIMITE_LEITURA_BLOCOS_MB * 1024 ** 2
+        variante = ("blocos" if em_blocos else "padrao") + ("-compacto" if compactar else "")
+
+        # O mesmo upload continua no widget a cada rerun: só processa arquivos novos
+        # ou o mesmo arquivo com outras opções de leitura
+        carregado = (uploaded_file.file_id, variante)
+        if st.session_state.get("arquivo_carregado") == carregado:
+            return
+
+        df, do_cache = dataset_cache.carregar_arquivo(
+            uploaded_file,
+            lambda arquivo: _compact(_load_uploaded_file(arquivo, em_blocos=em_blocos, compactar=compactar), compactar),
+            variante=variante
+        )
         if df is not None:
             newdata()
             st.session_state.df = df
-            st.success(f"✅ Arquivo {uploaded_file.name} carregado com sucesso.")
+            if do_cache:
+                st.session_state.compactacao = None
+            st.session_state.arquivo_carregado = carregado
+            origem = " (cache)" if do_cache else ""
+            st.success(f"✅ Arquivo {uploaded_file.name} carregado com sucesso{origem}.")
 
-def _load_uploaded_file(uploaded_file: FileUploader) -> Optional[DataFrame]:
+def _load_uploaded_file(uploaded_file: FileUploader, em_blocos: bool = False,
+                        compactar: bool = True) -> Optional[DataFrame]:
     """Carrega um arquivo enviado pelo usuário."""
     file_name = uploaded_file.name.lower()
+
+    if em_blocos and file_name.endswith(chunked_loading.STREAMING_EXTENSIONS):
+        try:
+            return _load_in_chunks(uploaded_file, compactar)
+        except chunked_loading.LeituraEmBlocosIndisponivel as e:
+            # Ex: JSON em formato de lista, que só pode ser lido de uma vez.
+            # Erros de leitura (ex: CSV malformado) não caem aqui: o arquivo não é relido inteiro
+            st.info(f"ℹ️ {e}. Carregando o arquivo inteiro.")
+            uploaded_file.seek(0)
+        except Exception as e:
+            st.error(f"❌ Erro ao ler o arquivo {file_name}: {str(e)}")
+            return None
+
     file_mapping = {
         '.csv': pd.read_csv,
         '.xlsx': pd.read_excel,
         '.xls': pd.read_excel,
         '.json': pd.read_json,
+        '.jsonl': lambda f: pd.read_json(f, lines=True),
         '.feather': pd.read_feather,
         '.ftr': pd.read_feather,
         '.parquet': pd.read_parquet
@@ -78,6 +132,34 @@ def _load_uploaded_file(uploaded_file: FileUploader) -> Optional[DataFrame]:
     st.error("Formato de arquivo não suportado")
     return None
 
+def _compact(df: Optional[DataFrame], compactar: bool = True) -> Optional[DataFrame]:
+    """Aplica a compactação de tipos e guarda o antes/depois do uso de memória."""
+    st.session_state.compactacao = None
+    if df is None or not compactar:
+        return df
+
+    df, antes, depois = compact_dtypes.compactar_dataframe(df)
+    st.session_state.compactacao = (antes, depois)
+    return df
+
+def _load_in_chunks(uploaded_file: FileUploader, compactar: bool = True) -> DataFrame:
+    """Lê o arquivo em blocos, exibindo o progresso da leitura."""
+    barra = st.progress(0.0, text="📦 Lendo arquivo em blocos...")
+
+    def atualizar(fracao, linhas):
+        barra.progress(fracao, text=f"📦 {linhas:,} registros lidos ({fracao:.0%})")
+
+    try:
+        return chunked_loading.ler_em_blocos(
+            uploaded_file,
+            uploaded_file.name,
+            tamanho=uploaded_file.size,
+            progresso=atualizar,
+            compactar=compactar
+        )
+    finally:
+        barra.empty()
+
 def _handle_demo_file():
     """Carrega o arquivo de demonstração quando solicitado."""
     if st.button("📁 Usar arquivo de demonstração", help="Carrega dados de exemplo para teste"):
@@ -86,7 +168,10 @@ def _handle_demo_file():
             if not demo_file.exists():
                 raise FileNotFoundError(f"Arquivo de demonstração não encontrado em {demo_file}")
             
-            df = pd.read_feather(demo_file)
+            df = _compact(
+                dataset_cache.ler_feather_mmap(demo_file),
+                st.session_state.get("compactar_tipos", True)
+            )
             newdata()
             st.session_state.df = df
             st.success("✅ Arquivo de demonstração carregado.")
@@ -102,6 +187,16 @@ def _display_loaded_data():
         with col1:
             st.metric("Total de Registros", len(st.session_state.df))
             st.metric("Total de Colunas", len(st.session_state.df.columns))
+            compactacao = st.session_state.get("compactacao")
+            if compactacao:
+                antes, depois = compactacao
+                st.metric(
+                    "Memória",
+                    f"{depois:,.1f} MB",
+                    delta=f"{depois - antes:,.1f} MB",
+                    delta_color="inverse",
+                    help=f"Antes da compactação: {antes:,.1f} MB"
+                )
         
         with col2:
             st.dataframe(
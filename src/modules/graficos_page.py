@@ -16,7 +16,7 @@ def mostrar():
     _setup_page_config()
 
     if st.session_state.df is not None:
-        df = st.session_state.df.copy()
+        df = st.session_state.df
 
     else:
         st.warning("⚠️ Carregue os dados na aba **Data**.")
\ No newline at end of file
@@ -3,6 +3,7 @@ import pandas as pd
 
 from functions import (
    models_regression,
+   split_indices,
 )
 
 def _setup_page_config():
@@ -20,10 +21,9 @@ def mostrar():
     _setup_page_config()
     
     if st.session_state.df is not None:
-        if st.session_state.df_treino is not None:
-            df_treino = st.session_state.df_treino.copy()
-            df_validation = st.session_state.df_validation.copy()
-            df_teste = st.session_state.df_teste.copy()
+        if st.session_state.divisao is not None:
+            # As partições só são materializadas quando um modelo é treinado
+            divisao = st.session_state.divisao
             target = st.session_state.target
             st.subheader("Selecione o tipo de modelagem:")
             
@@ -37,7 +37,9 @@ def mostrar():
                 with col1:
                     if st.button("Regressão Linear"):
                         st.session_state.modelo_selecionado = "Regressão Linear"
-                        models_regression.linear_regression(df_treino, df_validation, df_teste, target)
+                        models_regression.linear_regression(
+                            *(divisao.particao(nome) for nome in split_indices.PARTICOES), target
+                        )
                         st.success("Modelo de Regressão Linear selecionado!")
                         # Exemplo: rodar_regressao_linear()
                         
@@ -1,8 +1,22 @@
 import pandas as pd
 
-def preprocess_data(df):
-    df = df.copy()
-    # Ajuste este pipeline conforme suas variáveis
-    df.fillna(0, inplace=True)
-    df = pd.get_dummies(df)
-    return df
+from functions import preprocessing_pipeline
+
+def preprocess_data(df, pipeline=None, tamanho_lote=None):
+    """
+    Aplica nos dados de escoragem as mesmas transformações gravadas no treino.
+
+    Args:
+        df: DataFrame com os dados brutos
+        pipeline: Pipeline ajustado (padrão: model/preprocessing_pipeline.pkl)
+        tamanho_lote: Quantidade de linhas por lote (opcional)
+    """
+    if pipeline is None:
+        pipeline = preprocessing_pipeline.carregar_pipeline()
+
+    if pipeline is None:
+        # Sem pipeline gravado: pré-processamento genérico
+        df = df.fillna(0)
+        return pd.get_dummies(df)
+
+    return preprocessing_pipeline.aplicar_em_lotes(pipeline, df, tamanho_lote)
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from functions import process_duplicates
+
+
+def test_texto_faltante_continua_faltante():
+    df = pd.DataFrame({"nome": ["Ana", np.nan, "Bia"]})
+    normalizado = process_duplicates.normalizar_para_comparacao(df)
+    assert normalizado["nome"].isna().tolist() == [False, True, False]
+
+
+def test_texto_faltante_nao_vira_quase_duplicata():
+    df = pd.DataFrame({"id_cliente": [1, 1], "nome": ["Ana", np.nan]})
+    analise = process_duplicates.analisar_duplicatas(df, normalizar=True)
+    assert analise["n_duplicados"] == 0
@@ -0,0 +1,146 @@
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "mod38proj "))
+
+import scoring_server
+
+
+class ModeloFixo:
+    """Modelo de teste: probabilidade fixa e registro do tamanho de cada chamada."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, probabilidade=0.2):
+        self.probabilidade = probabilidade
+        self.lotes = []
+
+    def predict_proba(self, X):
+        self.lotes.append(len(X))
+        positiva = np.full(len(X), self.probabilidade)
+        return np.column_stack([1 - positiva, positiva])
+
+
+class ModeloTravado(ModeloFixo):
+    """Fica preso no predict_proba até `liberar` ser acionado."""
+
+    def __init__(self):
+        super().__init__()
+        self.entrou = threading.Event()
+        self.liberar = threading.Event()
+
+    def predict_proba(self, X):
+        self.entrou.set()
+        self.liberar.wait(5)
+        return super().predict_proba(X)
+
+
+@pytest.fixture
+def servidor():
+    """Servidor em uma porta livre; devolve (modelo, serviço, url base)."""
+    modelo = ModeloFixo()
+    servico = scoring_server.ServicoEscoragem(modelo, max_lote=64, espera_ms=200)
+    http = scoring_server.criar_servidor(servico, porta=0)
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    yield modelo, servico, f"http://127.0.0.1:{http.server_port}"
+    http.shutdown()
+    http.server_close()
+    servico.encerrar()
+
+
+def _post(url, corpo):
+    requisicao = urllib.request.Request(f"{url}/score", data=corpo, method="POST")
+    with urllib.request.urlopen(requisicao, timeout=10) as resposta:
+        return resposta.status, json.loads(resposta.read())
+
+
+def _get(url, rota):
+    with urllib.request.urlopen(f"{url}{rota}", timeout=10) as resposta:
+        return json.loads(resposta.read())
+
+
+def _post_simultaneos(url, n):
+    respostas = [None] * n
+    def enviar(i):
+        respostas[i] = _post(url, json.dumps({"renda": 1000 + i}).encode())
+    threads = [threading.Thread(target=enviar, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return respostas
+
+
+def test_requisicoes_simultaneas_formam_micro_lotes(servidor):
+    modelo, _, url = servidor
+    respostas = _post_simultaneos(url, 8)
+
+    assert all(status == 200 for status, _ in respostas)
+    assert all(corpo["score_probabilidade"] == pytest.approx(0.2) for _, corpo in respostas)
+    assert sum(modelo.lotes) == 8
+    # Com 200 ms de espera os pedidos simultâneos dividem chamadas ao modelo
+    assert len(modelo.lotes) < 8
+
+
+def test_metricas_contam_requisicoes_e_lotes(servidor):
+    modelo, _, url = servidor
+    _post_simultaneos(url, 8)
+
+    metricas = _get(url, "/metrics")
+    assert metricas["requisicoes"] == 8
+    assert metricas["erros"] == 0
+    assert metricas["fila"] == 0
+    assert metricas["lote_medio"] == pytest.approx(8 / len(modelo.lotes))
+    assert metricas["latencia_p50_ms"] <= metricas["latencia_p99_ms"]
+
+
+@pytest.mark.parametrize("corpo", [b"{renda: 1000", b"[]", b"42"])
+def test_json_invalido_retorna_400(servidor, corpo):
+    modelo, _, url = servidor
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _post(url, corpo)
+
+    assert erro.value.code == 400
+    assert "erro" in json.loads(erro.value.read())
+    assert modelo.lotes == []
+
+
+def test_encerrar_libera_pedidos_pendentes():
+    modelo = ModeloTravado()
+    servico = scoring_server.ServicoEscoragem(modelo, espera_ms=0)
+    erros = {}
+
+    def escorar(nome):
+        try:
+            servico.escorar({"renda": 1000}, timeout=5)
+        except Exception as e:
+            erros[nome] = e
+
+    em_andamento = threading.Thread(target=escorar, args=("em_andamento",))
+    em_andamento.start()
+    assert modelo.entrou.wait(5)
+
+    # O segundo pedido fica na fila enquanto o primeiro lote está no modelo
+    pendente = threading.Thread(target=escorar, args=("pendente",))
+    pendente.start()
+    prazo = time.monotonic() + 5
+    while servico.metricas()["fila"] < 1 and time.monotonic() < prazo:
+        time.sleep(0.01)
+    servico.encerrar()
+    modelo.liberar.set()
+    em_andamento.join(5)
+    pendente.join(5)
+
+    assert "em_andamento" not in erros
+    assert isinstance(erros["pendente"], RuntimeError)
+    with pytest.raises(RuntimeError):
+        servico.escorar({"renda": 1000})
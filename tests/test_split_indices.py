@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from functions import split_indices
+
+
+def _datas(n=600, meses=12, faltantes=20, seed=0):
+    """Datas diárias embaralhadas ao longo de `meses` meses, com alguns NaT."""
+    rng = np.random.default_rng(seed)
+    dias = pd.date_range("2023-01-01", periods=meses * 30, freq="D")
+    datas = pd.Series(rng.choice(dias, n))
+    datas.iloc[rng.choice(n, faltantes, replace=False)] = pd.NaT
+    return datas
+
+
+def _lados(indices):
+    return [set(indices[nome].tolist()) for nome in split_indices.PARTICOES]
+
+
+def test_split_temporal_particoes_disjuntas_cobrem_linhas_com_data():
+    datas = _datas()
+    ordem, datas_ordenadas = split_indices.ordenar_por_data(datas)
+    indices = split_indices.split_temporal(ordem, datas_ordenadas, "08/2023", "10/2023")
+
+    treino, validacao, teste = _lados(indices)
+    assert not (treino & validacao or treino & teste or validacao & teste)
+    assert treino | validacao | teste == set(np.flatnonzero(datas.notna()).tolist())
+    assert datas.iloc[indices["treino"]].max() < pd.Timestamp("2023-09-01")
+    assert datas.iloc[indices["teste"]].min() >= pd.Timestamp("2023-11-01")
+
+
+def test_split_percentual_igual_ao_train_test_split_no_dataframe():
+    df = pd.DataFrame({"x": np.arange(500)}, index=np.arange(500) * 3)
+    indices = split_indices.split_percentual(len(df), validacao=15, teste=15)
+
+    treino, resto = train_test_split(df, test_size=0.3, random_state=42)
+    validacao, teste = train_test_split(resto, test_size=0.5, random_state=42)
+    for nome, esperado in zip(split_indices.PARTICOES, [treino, validacao, teste]):
+        assert df.iloc[indices[nome]].index.tolist() == esperado.index.tolist()
+
+
+def test_split_estratificado_mantem_proporcao_das_classes():
+    rng = np.random.default_rng(1)
+    y = pd.Series(rng.choice(["bom", "mau", "fraude"], 2000, p=[0.8, 0.17, 0.03]))
+    indices = split_indices.split_estratificado(y, validacao=20, teste=20)
+
+    treino, validacao, teste = _lados(indices)
+    assert not (treino & validacao or treino & teste or validacao & teste)
+    assert len(treino | validacao | teste) == len(y)
+    proporcao = y.value_counts(normalize=True)
+    for nome in split_indices.PARTICOES:
+        parte = y.iloc[indices[nome]].value_counts(normalize=True)
+        assert parte.reindex(proporcao.index).to_numpy() == pytest.approx(proporcao.to_numpy(), abs=0.01)
+
+
+def test_dobras_estratificadas_mantem_proporcao_das_classes():
+    y = pd.Series([0] * 900 + [1] * 100)
+    for _, teste in split_indices.dobras_estratificadas(y, n_dobras=5):
+        assert y.iloc[teste].mean() == pytest.approx(0.1, abs=0.01)
+
+
+def _grupos(n=1500, n_grupos=200, seed=2):
+    return pd.Series(np.random.default_rng(seed).integers(0, n_grupos, n))
+
+
+def test_split_por_grupo_nao_separa_um_grupo():
+    grupos = _grupos()
+    indices = split_indices.split_por_grupo(grupos, validacao=20, teste=20)
+
+    assert sum(len(posicoes) for posicoes in indices.values()) == len(grupos)
+    treino, validacao, teste = (set(grupos.iloc[indices[nome]]) for nome in split_indices.PARTICOES)
+    assert not (treino & validacao or treino & teste or validacao & teste)
+
+
+def test_dobras_por_grupo_nao_separam_um_grupo():
+    grupos = _grupos()
+    dobras = split_indices.dobras_por_grupo(grupos, n_dobras=5)
+
+    testados = np.concatenate([teste for _, teste in dobras])
+    assert sorted(testados.tolist()) == list(range(len(grupos)))
+    for treino, teste in dobras:
+        assert not set(grupos.iloc[treino]) & set(grupos.iloc[teste])
+
+
+def test_walk_forward_dobras_em_ordem_temporal():
+    datas = _datas()
+    ordem, datas_ordenadas = split_indices.ordenar_por_data(datas)
+    indices, dobras = split_indices.split_walk_forward(ordem, datas_ordenadas, n_janelas=3, meses_janela=1)
+
+    treino, validacao, teste = _lados(indices)
+    assert not (treino & validacao or treino & teste or validacao & teste)
+    assert treino | validacao | teste == set(np.flatnonzero(datas.notna()).tolist())
+    assert len(dobras) == 3
+
+    # As posições das dobras são sobre treino + validação, em ordem cronológica
+    inicios_teste = []
+    for posicoes_treino, posicoes_teste in dobras:
+        assert datas_ordenadas[posicoes_treino].max() < datas_ordenadas[posicoes_teste].min()
+        assert len(np.unique(datas_ordenadas[posicoes_teste].astype("datetime64[M]"))) == 1
+        inicios_teste.append(datas_ordenadas[posicoes_teste].min())
+    assert inicios_teste == sorted(inicios_teste)
+    # A última dobra testa a própria validação
+    assert set(ordem[dobras[-1][1]].tolist()) == validacao
+
+
+def test_walk_forward_respeita_meses_de_treino():
+    ordem, datas_ordenadas = split_indices.ordenar_por_data(_datas())
+    _, dobras = split_indices.split_walk_forward(ordem, datas_ordenadas, n_janelas=3, meses_janela=1, meses_treino=2)
+
+    for posicoes_treino, _ in dobras:
+        assert len(np.unique(datas_ordenadas[posicoes_treino].astype("datetime64[M]"))) == 2
+
+
+def test_walk_forward_erro_com_poucos_meses():
+    ordem, datas_ordenadas = split_indices.ordenar_por_data(_datas(meses=4, faltantes=0))
+    with pytest.raises(ValueError, match="meses"):
+        split_indices.split_walk_forward(ordem, datas_ordenadas, n_janelas=3, meses_janela=1)